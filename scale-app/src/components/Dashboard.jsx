@@ -5,13 +5,33 @@ import { LineChart } from '@mui/x-charts/LineChart';
 // Display graph data
 
 const API_URL = import.meta.env.VITE_API_URL;
+// Points requested from the server; it picks them from larger files with its
+// default method, LTTB, which keeps short spikes a bucket mean would flatten
+const CHART_POINTS = 1200;
 
-// Helper to parse ISO string with 'Z' (UTC) to Date object
-function parseTimestamp(ts) {
-  // Some browsers need the 'Z' at the end for UTC, but Date.parse() usually works with ISO 8601.
-  // However, we explicitly parse and check for valid Date.
-  const d = new Date(ts);
-  return isNaN(d.getTime()) ? null : d;
+// Header of the format=binary response, see pack_columns in server/dashboard.py
+const BINARY_MAGIC = "WSR1";
+const BINARY_HEADER_SIZE = 24;
+
+// Decode the packed response into typed arrays (little-endian, like every
+// platform browsers run on). Returns null for anything else, e.g. the JSON
+// reply sent when there are no files.
+function decodeSeries(buffer) {
+  if (buffer.byteLength < BINARY_HEADER_SIZE) return null;
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+  if (magic !== BINARY_MAGIC) return null;
+  const count = view.getUint32(4, true);
+  return {
+    timestamps: new Float64Array(buffer, BINARY_HEADER_SIZE, count),
+    values: new Float64Array(buffer, BINARY_HEADER_SIZE + 8 * count, count),
+  };
+}
+
+// Timestamps are ms on the recording's wall clock with no timezone, like the
+// ISO strings in the CSV, so shift them to show the same local time.
+function wallClockToDate(ms) {
+  return new Date(ms + new Date(ms).getTimezoneOffset() * 60000);
 }
 
 // Calculate 5-point moving average for an array of numbers
@@ -23,29 +43,41 @@ function movingAverage(values, windowSize = 5) {
       avg.push(null); // Not enough data points
     } else {
       const window = values.slice(i - windowSize + 1, i + 1);
-      avg.push(window.reduce((sum, v) => sum + v, 0) / window.length);
+      // gaps (failed reads) leave a gap in the average too
+      avg.push(window.includes(null) ? null : window.reduce((sum, v) => sum + v, 0) / window.length);
     }
   }
   return avg;
 }
 
 function Dashboard({ selectedFile }) {
-  const [data, setData] = useState([]);
+  const [data, setData] = useState({ xData: [], yData: [] });
   const [filename, setFilename] = useState(selectedFile);
 
   useEffect(() => {
     if (!selectedFile) return;
     setFilename(selectedFile);
     axios
-      .get(`${API_URL}/dashboard?file=${encodeURIComponent(selectedFile)}`)
-      .then(res => setData(res.data.data))
-      .catch(err => setData([]));
+      .get(`${API_URL}/dashboard`, {
+        params: { file: selectedFile, points: CHART_POINTS, format: "binary" },
+        responseType: "arraybuffer",
+      })
+      .then(res => {
+        const series = decodeSeries(res.data);
+        if (!series) {
+          setData({ xData: [], yData: [] });
+          return;
+        }
+        setData({
+          xData: Array.from(series.timestamps, wallClockToDate),
+          // failed reads arrive as NaN; null leaves a gap in the chart
+          yData: Array.from(series.values, v => (Number.isNaN(v) ? null : v)),
+        });
+      })
+      .catch(err => setData({ xData: [], yData: [] }));
   }, [selectedFile]);
 
-  const xData = data.map(point => parseTimestamp(point.Timestamp)).filter(Boolean);
-  const yData = data
-    .map(point => point.Value)
-    .slice(0, xData.length); // Ensure lengths match
+  const { xData, yData } = data;
 
 const maData = movingAverage(yData, 5)
 
@@ -33,26 +33,23 @@ function SensorControl({ onDataChanged }) {
       });
   }, []);
 
-  // Poll sensor value when running
+  // Live sensor value pushed by the server (Server-Sent Events) while running
   useEffect(() => {
-    let intervalId;
-    if (sensorRunning) {
-      // Fetch sensor value every 500ms
-      intervalId = setInterval(() => {
-        axios
-          .get(`${API_URL}/sensor/value`)
-          .then((res) => {
-            let val = res.data.value;
-            if (typeof val === "number") {
-              setSensorValue(val.toFixed(2)); // Format to 2 decimal places
-            } else setSensorValue(val); // Handle unexpected response
-          })
-          .catch(() => setSensorValue(null));
-      }, 500);
-    } else {
+    if (!sensorRunning) {
       setSensorValue(null);
+      return;
     }
-    return () => clearInterval(intervalId);
+    // coalesce=1: the display only needs the newest sample
+    const source = new EventSource(`${API_URL}/sensor/stream?coalesce=1`);
+    source.addEventListener("sample", (event) => {
+      const val = JSON.parse(event.data).value;
+      if (typeof val === "number") {
+        setSensorValue(val.toFixed(2)); // Format to 2 decimal places
+      } else setSensorValue(val); // Handle unexpected response
+    });
+    // EventSource reconnects by itself; blank the display until it does
+    source.onerror = () => setSensorValue(null);
+    return () => source.close();
   }, [sensorRunning]);
 
   // Start calibration flow
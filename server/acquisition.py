@@ -0,0 +1,169 @@
+"""
+Run the sensor loop in its own process, away from Flask request handling,
+JPEG encoding and the GIL.
+
+The child is forked so it inherits the already-configured HX711 (line
+request, offset, scale) and publishes every sample into a SampleRing in
+shared memory. The web process reads the ring directly; there is no lock,
+pipe or copy of the buffer.
+"""
+import os
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from scheduler import POLICIES
+
+SAMPLE_DTYPE = np.dtype([("timestamp_ns", "<i8"), ("raw", "<i4"), ("weight", "<f8")])
+# scheduler.RateScheduler stats mirrored into the ring header for the web process, as
+# float64s: the counters are cast back on the way out and policy is its index in POLICIES
+STATS_FIELDS = ("target_rate_hz", "achieved_rate_hz", "jitter_ms", "mean_lateness_ms",
+                "max_lateness_ms", "missed_deadlines", "ticks", "policy")
+STATS_COUNTERS = ("missed_deadlines", "ticks")
+
+class SampleRing:
+    """
+    Single-writer ring buffer of SAMPLE_DTYPE records in shared memory.
+
+    Layout: a 128-byte header holding the total number of samples written
+    and the acquisition loop's STATS_FIELDS, then `capacity` records. The writer fills a record
+    before publishing the new count, so a reader that sees count n can read
+    record n - 1.
+    """
+
+    HEADER_SIZE = 128
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        size = self.HEADER_SIZE + capacity * SAMPLE_DTYPE.itemsize
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._count = np.ndarray((1,), dtype=np.uint64, buffer=self._shm.buf)
+        self._stats = np.ndarray((len(STATS_FIELDS),), dtype=np.float64, buffer=self._shm.buf,
+                                 offset=8)
+        self._records = np.ndarray((capacity,), dtype=SAMPLE_DTYPE, buffer=self._shm.buf,
+                                   offset=self.HEADER_SIZE)
+        self._count[0] = 0
+        self._stats[:] = 0.0
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def count(self):
+        return int(self._count[0])
+
+    def push(self, timestamp_ns, raw, weight):
+        count = int(self._count[0])
+        self._records[count % self.capacity] = (timestamp_ns, raw, weight)
+        self._count[0] = count + 1
+
+    def publish_stats(self, stats):
+        stats = dict(stats, policy=POLICIES.index(stats["policy"]))
+        self._stats[:] = [stats[field] for field in STATS_FIELDS]
+
+    def read_stats(self):
+        """The published stats, shaped like RateScheduler.stats()."""
+        stats = dict(zip(STATS_FIELDS, self._stats.tolist()))
+        for field in STATS_COUNTERS:
+            stats[field] = int(stats[field])
+        stats["policy"] = POLICIES[int(stats["policy"])]
+        return stats
+
+    def latest(self):
+        """Return (timestamp_ns, raw, weight) of the newest sample, or None."""
+        while True:
+            count = int(self._count[0])
+            if count == 0:
+                return None
+            record = self._records[(count - 1) % self.capacity]
+            sample = (int(record["timestamp_ns"]), int(record["raw"]), float(record["weight"]))
+            # only retry if the writer lapped the whole ring while we read
+            if int(self._count[0]) - count < self.capacity - 1:
+                return sample
+
+    def read_since(self, seq):
+        """
+        Return (samples, new_seq) with the records written after sequence
+        number seq. If the reader fell more than `capacity` behind, the oldest
+        samples are lost and only the last `capacity` are returned.
+        """
+        count = int(self._count[0])
+        start = max(seq, count - self.capacity)
+        if start >= count:
+            return self._records[:0].copy(), count
+        indices = np.arange(start, count) % self.capacity
+        return self._records[indices], count
+
+    def close(self, unlink=True):
+        # numpy views must go before the mapping can be closed
+        del self._count, self._stats, self._records
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+
+def _set_realtime(cpu, priority):
+    if cpu is not None:
+        try:
+            os.sched_setaffinity(0, {cpu})
+            print(f"[DEBUG] acquisition: pinned to CPU {cpu}")
+        except (AttributeError, OSError) as e:
+            print(f"[DEBUG] acquisition: could not set CPU affinity: {e}")
+    if priority:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+            print(f"[DEBUG] acquisition: SCHED_FIFO priority {priority}")
+        except (AttributeError, OSError) as e:
+            # needs root or CAP_SYS_NICE
+            print(f"[DEBUG] acquisition: could not set SCHED_FIFO: {e}")
+
+def _acquisition_main(ring, run_event, cpu, priority):
+    import sensor
+    _set_realtime(cpu, priority)
+    sensor.sensor_thread_event = run_event
+    sensor.attach_sample_ring(ring)
+    sensor.read_sensor_loop()
+
+class AcquisitionProcess:
+    """Forked child running sensor.read_sensor_loop, optionally pinned and SCHED_FIFO."""
+
+    def __init__(self, capacity=4096, cpu=None, priority=None):
+        self.capacity = capacity
+        self.cpu = cpu
+        self.priority = priority
+        self.ring = None
+        self.process = None
+        self._run_event = None
+
+    def start(self):
+        ctx = mp.get_context("fork")
+        self.ring = SampleRing(self.capacity)
+        self._run_event = ctx.Event()
+        self._run_event.set()
+        self.process = ctx.Process(
+            target=_acquisition_main,
+            args=(self.ring, self._run_event, self.cpu, self.priority),
+            name="hx711-acquisition",
+            daemon=True,
+        )
+        self.process.start()
+        print(f"[DEBUG] acquisition: started pid={self.process.pid} ring={self.ring.name}")
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def stop(self, timeout=5.0):
+        if self.process is None:
+            return
+        self._run_event.clear()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            print("[DEBUG] acquisition: child did not exit, terminating")
+            self.process.terminate()
+            self.process.join(1.0)
+        self.process = None
+
+    def close(self):
+        self.stop()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
@@ -0,0 +1,8 @@
+"""
+Benchmarks for the sensor acquisition, filtering, persistence and dashboard
+paths. Run from the server directory with:
+
+    python -m bench [--stages NAME ...] [--rows N ...] [--compare OLD.json]
+
+Hardware is replaced by hx711_sim.SimulatedHX711, so this runs anywhere.
+"""
@@ -0,0 +1,99 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+# Benchmarks never touch real hardware; set before main/sensor get imported.
+os.environ.setdefault("HX711_BACKEND", "sim")
+os.environ.setdefault("HX711_SIM_REALTIME", "0")
+
+from bench.harness import measure
+from bench.stages import STAGES
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+def git_revision():
+    try:
+        rev = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                      stderr=subprocess.DEVNULL).strip()
+        dirty = subprocess.call(["git", "diff", "--quiet", "HEAD", "--", "."],
+                                stderr=subprocess.DEVNULL) != 0
+        return rev + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def format_row(stage_name, label, stats):
+    return (f"{stage_name:<28} {label:<36} "
+            f"{stats['p50_s'] * 1e6:>12.1f} {stats['p99_s'] * 1e6:>12.1f} "
+            f"{stats['throughput_per_s']:>14.1f} {stats['alloc_peak_bytes'] / 1024:>12.1f}")
+
+def compare(old_path, results):
+    with open(old_path) as f:
+        old = json.load(f)
+    old_stats = {(r["stage"], r["case"]): r for r in old["results"]}
+    print(f"\nCompared with {old_path} ({old.get('revision', '?')}):")
+    print(f"{'stage':<28} {'case':<36} {'p50 ratio':>12} {'tput ratio':>12}")
+    for r in results:
+        prev = old_stats.get((r["stage"], r["case"]))
+        if not prev:
+            continue
+        p50 = r["p50_s"] / prev["p50_s"] if prev["p50_s"] else float("nan")
+        tput = (r["throughput_per_s"] / prev["throughput_per_s"]
+                if prev["throughput_per_s"] else float("nan"))
+        print(f"{r['stage']:<28} {r['case']:<36} {p50:>12.3f} {tput:>12.3f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench",
+                                     description="Benchmark the sensor and dashboard paths.")
+    parser.add_argument("--stages", nargs="*", default=None,
+                        help=f"stages to run (default: all). Available: {', '.join(STAGES)}")
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--readings", type=int, nargs="*", default=[5, 30],
+                        help="batch sizes for the HX711 aggregation stages")
+    parser.add_argument("--rows", type=int, nargs="*", default=[10000, 100000, 2000000],
+                        help="sizes of the synthetic CSVs generated (in a temporary directory) for /dashboard")
+    parser.add_argument("--files", nargs="*", default=[],
+                        help="existing CSVs in server/data to benchmark /dashboard against")
+    parser.add_argument("--max-file-iterations", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None,
+                        help="results JSON path (default: bench/results/<revision>.json)")
+    parser.add_argument("--compare", default=None, help="previous results JSON to compare against")
+    options = parser.parse_args(argv)
+
+    selected = options.stages or list(STAGES)
+    unknown = [name for name in selected if name not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    revision = git_revision()
+    print(f"{'stage':<28} {'case':<36} {'p50 us':>12} {'p99 us':>12} {'units/s':>14} {'peak KiB':>12}")
+    results = []
+    for stage_name in selected:
+        for label, fn, units, iterations in STAGES[stage_name](options):
+            stats = measure(fn, iterations=iterations, warmup=min(10, iterations),
+                            units_per_call=units, alloc_iterations=min(iterations, 50))
+            print(format_row(stage_name, label, stats))
+            results.append({"stage": stage_name, "case": label, **stats})
+
+    output = options.output or os.path.join(RESULTS_DIR, f"{revision}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "revision": revision,
+            "created": datetime.datetime.now().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "results": results,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if options.compare:
+        compare(options.compare, results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import gc
+import time
+import tracemalloc
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+def measure(fn, iterations=1000, warmup=10, units_per_call=1, alloc_iterations=None):
+    """
+    Time fn() over `iterations` calls and trace allocations over a separate,
+    smaller pass (tracemalloc slows everything down, so it never overlaps the
+    timed pass).
+
+    Returns a dict of latency percentiles (seconds per call), throughput
+    (units per second) and allocation stats (bytes per call).
+    """
+    for _ in range(warmup):
+        fn()
+
+    gc.collect()
+    timings = []
+    perf = time.perf_counter
+    start = perf()
+    for _ in range(iterations):
+        t0 = perf()
+        fn()
+        timings.append(perf() - t0)
+    total = perf() - start
+    timings.sort()
+
+    if alloc_iterations is None:
+        alloc_iterations = max(1, min(iterations, 50))
+    tracemalloc.start()
+    peak_bytes = 0
+    net_bytes = 0
+    try:
+        for _ in range(alloc_iterations):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            fn()
+            after, peak = tracemalloc.get_traced_memory()
+            peak_bytes = max(peak_bytes, peak - before)
+            net_bytes += after - before
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "units_per_call": units_per_call,
+        "total_s": total,
+        "mean_s": total / iterations,
+        "p50_s": _percentile(timings, 50),
+        "p99_s": _percentile(timings, 99),
+        "max_s": timings[-1],
+        "throughput_per_s": iterations * units_per_call / total if total else 0.0,
+        "alloc_peak_bytes": peak_bytes,
+        "alloc_net_bytes_per_call": net_bytes / alloc_iterations,
+    }
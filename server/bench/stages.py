@@ -0,0 +1,185 @@
+import contextlib
+import datetime
+import io
+import os
+import random
+import shutil
+import tempfile
+
+STAGES = {}
+
+def stage(name):
+    """Register a benchmark stage. The factory yields (label, fn, units_per_call, iterations)."""
+    def register(factory):
+        STAGES[name] = factory
+        return factory
+    return register
+
+def _make_hx(options):
+    from hx711_sim import SimulatedHX711
+    return SimulatedHX711(noise=40.0, dropout=0.02, signal=25000, seed=options.seed)
+
+def make_csv(path, rows, rate_hz=2.0, seed=0):
+    """Write a sensor-style CSV of `rows` samples, in the format read_sensor_loop produces."""
+    rng = random.Random(seed)
+    start = datetime.datetime(2025, 1, 1)
+    step = datetime.timedelta(seconds=1.0 / rate_hz)
+    value = 433000.0
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="") as f:
+        f.write("Timestamp,Value\n")
+        chunk = []
+        for i in range(rows):
+            value += rng.gauss(0.0, 5.0)
+            chunk.append(f"{(start + i * step).isoformat()},{value}\n")
+            if len(chunk) >= 10000:
+                f.write("".join(chunk))
+                chunk.clear()
+        f.write("".join(chunk))
+    os.replace(tmp, path)
+
+def bench_csv_path(data_dir, rows):
+    path = os.path.join(data_dir, f"bench_{rows}.csv")
+    if not os.path.exists(path):
+        print(f"[bench] generating {path} ...")
+        make_csv(path, rows)
+    return path
+
+@contextlib.contextmanager
+def quiet():
+    """Swallow the [DEBUG] prints of the code under test; their formatting cost still counts."""
+    with contextlib.redirect_stdout(io.StringIO()) as sink:
+        yield sink
+
+def _quietly(fn):
+    def run():
+        with quiet():
+            return fn()
+    return run
+
+@stage("hx711.read")
+def hx711_read(options):
+    hx = _make_hx(options)
+    yield "single conversion", hx._read, 1, options.iterations * 10
+
+@stage("hx711.get_raw_data_mean")
+def hx711_get_raw_data_mean(options):
+    from hx711_filters import FILTERS
+    hx = _make_hx(options)
+    default_filter = hx.get_data_filter()
+    for name, data_filter in [("statistics", default_filter)] + list(FILTERS.items()):
+        for readings in options.readings:
+            def run(r=readings, f=data_filter):
+                hx.set_data_filter(f)
+                return hx.get_raw_data_mean(r)
+            yield f"{name} readings={readings}", run, readings, options.iterations
+
+@stage("hx711.outliers_filter")
+def hx711_outliers_filter(options):
+    hx = _make_hx(options)
+    rng = random.Random(options.seed)
+    for readings in options.readings:
+        data = [int(rng.gauss(433000, 40)) for _ in range(readings)]
+        yield f"n={readings}", (lambda d=data: hx.outliers_filter(d)), readings, options.iterations
+
+@stage("hx711_filters")
+def numpy_filters(options):
+    import numpy as np
+    from hx711_filters import FILTERS
+    rng = np.random.default_rng(options.seed)
+    for readings in options.readings:
+        data = rng.normal(433000, 40, readings).astype(np.int32)
+        for name, data_filter in FILTERS.items():
+            yield f"{name} n={readings}", (lambda d=data, f=data_filter: f(d).mean()), readings, options.iterations
+
+@stage("stream_filters")
+def stream_filters(options):
+    from stream_filters import make_stream_filter
+    rng = random.Random(options.seed)
+    data = [int(rng.gauss(433000, 40)) for _ in range(1000)]
+    for spec in ("ema", "median:5", "kalman", "median:5,kalman"):
+        def run(f=make_stream_filter(spec)):
+            for x in data:
+                f.update(x)
+        yield spec, run, len(data), options.iterations
+
+@stage("hx711.get_filtered_reading")
+def hx711_get_filtered_reading(options):
+    from stream_filters import make_stream_filter
+    hx = _make_hx(options)
+    stream_filter = make_stream_filter("median:5,kalman")
+    yield "median:5,kalman", (lambda: hx.get_filtered_reading(stream_filter)), 1, options.iterations * 10
+
+@stage("sensor.read_mass")
+def sensor_read_mass(options):
+    import sensor
+    sensor.set_hx(_make_hx(options))
+    yield "default", _quietly(sensor.read_mass), 1, options.iterations
+
+@stage("sensor.write_mass_to_csv")
+def sensor_write_mass_to_csv(options):
+    import sensor
+    tmp_dir = tempfile.mkdtemp(prefix="bench_csv_")
+    filename = os.path.join(tmp_dir, "samples.csv")
+    now = datetime.datetime.now().isoformat()
+    try:
+        yield "append one row", (lambda: sensor.write_mass_to_csv(123.456, now, filename)), 1, options.iterations
+    finally:
+        if os.path.exists(filename):
+            os.remove(filename)
+        os.rmdir(tmp_dir)
+
+@stage("csv_writer.BufferedCsvWriter")
+def buffered_csv_writer(options):
+    from csv_writer import BufferedCsvWriter
+    tmp_dir = tempfile.mkdtemp(prefix="bench_csv_")
+    now = datetime.datetime.now()
+    writers = []
+    try:
+        for flush_rows in (1, 50):
+            writer = BufferedCsvWriter(tmp_dir, flush_rows=flush_rows, flush_interval=60.0)
+            writers.append(writer)
+            yield f"append one row, flush_rows={flush_rows}", (lambda w=writer: w.write(now, 123.456)), 1, options.iterations
+    finally:
+        for writer in writers:
+            writer.close()
+        for name in os.listdir(tmp_dir):
+            os.remove(os.path.join(tmp_dir, name))
+        os.rmdir(tmp_dir)
+
+@stage("dashboard")
+def dashboard(options):
+    with quiet():
+        import main
+    from series_cache import SeriesCache
+    client = main.app.test_client()
+    data_dir, series_cache = main.DATA_DIR, main.series_cache
+    # generated files live in a scratch data directory for the run, never in
+    # server/data where /list-csv and /dashboard would serve them
+    with tempfile.TemporaryDirectory(prefix="bench_dashboard_") as tmp_dir:
+        files = [(os.path.basename(bench_csv_path(tmp_dir, rows)), rows) for rows in options.rows]
+        for name in options.files:
+            shutil.copy(os.path.join(data_dir, name), os.path.join(tmp_dir, name))
+            with open(os.path.join(tmp_dir, name)) as f:
+                files.append((name, sum(1 for _ in f) - 1))
+        main.DATA_DIR = tmp_dir
+        # unbounded, so "warm" is a cache hit whatever the file size and
+        # DASHBOARD_CACHE_MB; "cold" parses the file on every call
+        cache = main.series_cache = SeriesCache(max_bytes=float("inf"))
+        try:
+            for name, rows in files:
+                def request(name=name):
+                    response = client.get("/dashboard", query_string={"file": name})
+                    if response.status_code != 200:
+                        raise RuntimeError(f"/dashboard returned {response.status_code}")
+                    return response.get_data()
+
+                def cold(request=request):
+                    cache.clear()
+                    return request()
+
+                iterations = max(1, min(options.iterations, options.max_file_iterations))
+                yield f"{name} ({rows} rows, cold)", cold, rows, iterations
+                yield f"{name} ({rows} rows, warm)", request, rows, iterations
+        finally:
+            main.DATA_DIR, main.series_cache = data_dir, series_cache
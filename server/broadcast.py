@@ -0,0 +1,130 @@
+"""
+Push live samples to /sensor/stream clients as Server-Sent Events.
+
+SampleBroadcaster.publish() is called once per sample by the sensor loop
+(or by RingBridge when acquisition runs in its own process) and only
+appends to each subscriber's bounded queue, so a slow or stalled client
+never holds up the loop. A full queue drops its oldest sample and counts
+it in `dropped`. Each client's generator wakes once per burst and writes
+everything queued since the last wakeup as one chunk; a subscription with
+maxlen=1 only ever sees the newest value.
+"""
+import collections
+import json
+import threading
+from timeseries_store import from_ns
+
+class Subscription:
+    def __init__(self, maxlen):
+        self._queue = collections.deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self.dropped = 0
+
+    def put(self, sample):
+        with self._lock:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append(sample)
+        self._ready.set()
+
+    def get(self, timeout=None):
+        """Every sample queued since the last call; empty if nothing arrived within timeout."""
+        self._ready.wait(timeout)
+        with self._lock:
+            self._ready.clear()
+            samples = list(self._queue)
+            self._queue.clear()
+        return samples
+
+class SampleBroadcaster:
+    def __init__(self, maxlen=256):
+        self.maxlen = maxlen
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    def subscribe(self, maxlen=None):
+        subscription = Subscription(maxlen or self.maxlen)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def publish(self, *fields):
+        """Queue (seq, *fields) for every subscriber; samples are (timestamp_ns, raw, value)."""
+        with self._lock:
+            self._seq += 1
+            sample = (self._seq, *fields)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(sample)
+
+def _event(sample, dropped):
+    seq, timestamp_ns, raw, value = sample
+    data = {"timestamp": from_ns(timestamp_ns).isoformat(), "value": value, "raw": raw}
+    if dropped:
+        data["dropped"] = dropped
+    return f"id: {seq}\nevent: sample\ndata: {json.dumps(data)}\n\n"
+
+def sse_stream(broadcaster, subscription, keepalive=15.0, render=_event):
+    """
+    text/event-stream body for one client. The comment line sent when idle
+    keeps proxies from closing the connection and lets the server notice a
+    client that went away. render(item, dropped) formats one queued item.
+    """
+    try:
+        yield "retry: 2000\n\n"
+        reported = 0
+        while True:
+            samples = subscription.get(keepalive)
+            if not samples:
+                yield ": keepalive\n\n"
+                continue
+            dropped = subscription.dropped
+            chunk = "".join(render(sample, dropped - reported if i == 0 else 0)
+                            for i, sample in enumerate(samples))
+            reported = dropped
+            yield chunk
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+class RingBridge:
+    """
+    Republishes samples an acquisition process writes to its SampleRing,
+    for the broadcaster in the web process. on_sample(timestamp_ns, value),
+    if given, also sees each one.
+    """
+
+    def __init__(self, ring, broadcaster, interval=0.02, on_sample=None):
+        self.ring = ring
+        self.broadcaster = broadcaster
+        self.on_sample = on_sample
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="ring-bridge", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        seq = self.ring.count
+        while not self._stop.wait(self.interval):
+            records, seq = self.ring.read_since(seq)
+            for record in records.tolist():
+                self.broadcaster.publish(*record)
+                if self.on_sample is not None:
+                    self.on_sample(record[0], record[2])
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
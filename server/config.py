@@ -1,3 +1,4 @@
+import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
@@ -8,5 +9,63 @@ CORS(app, origins='*')
 app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///database.db"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+# "gpiod" drives the real HX711, "sim" uses hx711_sim.SimulatedHX711
+app.config["HX711_BACKEND"] = os.environ.get("HX711_BACKEND", "gpiod")
+# Batch outlier filter from hx711_filters.FILTERS ("outliers", "mad", "trimmed",
+# "sigma_clip"); unset keeps the statistics-module filter
+app.config["HX711_FILTER"] = os.environ.get("HX711_FILTER") or None
+# Per-sample filter chain over single conversions instead of batch averaging
+# (stream_filters.py), e.g. "median:5,kalman" or "ema:0.2"; unset keeps batches
+app.config["SENSOR_STREAM_FILTER"] = os.environ.get("SENSOR_STREAM_FILTER") or None
+
+# "thread" runs the sensor loop inside the web process, "process" forks a
+# dedicated acquisition process (see acquisition.py), optionally pinned to
+# SENSOR_CPU and scheduled SCHED_FIFO at SENSOR_RT_PRIORITY
+app.config["SENSOR_ACQUISITION"] = os.environ.get("SENSOR_ACQUISITION", "thread")
+app.config["SENSOR_CPU"] = int(os.environ["SENSOR_CPU"]) if os.environ.get("SENSOR_CPU") else None
+app.config["SENSOR_RT_PRIORITY"] = int(os.environ.get("SENSOR_RT_PRIORITY", 0))
+
+# Sample rate of the sensor loop (0.1 Hz up to 80 Hz) and what to do with
+# missed deadlines: "skip" them or "catchup"
+app.config["SENSOR_SAMPLE_RATE_HZ"] = float(os.environ.get("SENSOR_SAMPLE_RATE_HZ", 2.0))
+app.config["SENSOR_SCHEDULE_POLICY"] = os.environ.get("SENSOR_SCHEDULE_POLICY", "skip")
+
+# CSV rows are buffered and flushed every N rows or T seconds, whichever comes first
+app.config["SENSOR_CSV_FLUSH_ROWS"] = int(os.environ.get("SENSOR_CSV_FLUSH_ROWS", 50))
+app.config["SENSOR_CSV_FLUSH_INTERVAL"] = float(os.environ.get("SENSOR_CSV_FLUSH_INTERVAL", 5.0))
+app.config["SENSOR_CSV_FSYNC"] = os.environ.get("SENSOR_CSV_FSYNC", "0") not in ("0", "false", "False", "")
+# Also record samples to the binary store in data/series (timeseries_store.py)
+app.config["SENSOR_BINARY_STORE"] = os.environ.get("SENSOR_BINARY_STORE", "1") not in ("0", "false", "False", "")
+# Maintain min/max/mean/count rollups in data/rollups (rollups.py) for the dashboard
+app.config["SENSOR_ROLLUPS"] = os.environ.get("SENSOR_ROLLUPS", "1") not in ("0", "false", "False", "")
+# Detect steps, transients and settled plateaus online and log them to
+# data/events (events.py): a plateau is SENSOR_EVENT_WINDOW samples whose
+# standard deviation is within SENSOR_EVENT_TOLERANCE, and changes of at
+# least SENSOR_EVENT_STEP (weight units) are reported
+app.config["SENSOR_EVENTS"] = os.environ.get("SENSOR_EVENTS", "1") not in ("0", "false", "False", "")
+app.config["SENSOR_EVENT_WINDOW"] = int(os.environ.get("SENSOR_EVENT_WINDOW", 8))
+app.config["SENSOR_EVENT_TOLERANCE"] = float(os.environ.get("SENSOR_EVENT_TOLERANCE", 5.0))
+app.config["SENSOR_EVENT_STEP"] = float(os.environ.get("SENSOR_EVENT_STEP", 20.0))
+# Memory budget of the parsed-CSV cache behind /dashboard (series_cache.py)
+app.config["DASHBOARD_CACHE_MB"] = float(os.environ.get("DASHBOARD_CACHE_MB", 64))
+# "picamera2" uses the Pi camera, "fake" a generated test pattern (fake_camera.py)
+app.config["VIDEO_BACKEND"] = os.environ.get("VIDEO_BACKEND", "picamera2")
+# JPEGs for /video_feed: "auto" (camera MJPEG encoder, else OpenCV), "mjpeg",
+# "jpeg" (Picamera2 encoders) or "opencv"
+app.config["VIDEO_ENCODER"] = os.environ.get("VIDEO_ENCODER", "auto")
+# Capture rate while frames are used (/video_feed viewers of the OpenCV
+# encoder, recordings fed frames), 0.1-120, and the rate it drops to
+# otherwise (0 pauses capture)
+app.config["VIDEO_FPS"] = float(os.environ.get("VIDEO_FPS", 30.0))
+app.config["VIDEO_IDLE_FPS"] = float(os.environ.get("VIDEO_IDLE_FPS", 1.0))
+# Recordings: codec ("xvid", "mjpg" stores the stream's JPEGs as they are,
+# "h264" uses the camera encoder), rolling segment length and optional size
+# cap, and a disk budget for data/videos beyond which the oldest segments
+# are deleted (0 keeps everything)
+app.config["VIDEO_CODEC"] = os.environ.get("VIDEO_CODEC", "xvid")
+app.config["VIDEO_SEGMENT_SECONDS"] = float(os.environ.get("VIDEO_SEGMENT_SECONDS", 600))
+app.config["VIDEO_SEGMENT_MB"] = float(os.environ.get("VIDEO_SEGMENT_MB", 0))
+app.config["VIDEO_RETENTION_MB"] = float(os.environ.get("VIDEO_RETENTION_MB", 0))
+
 db = SQLAlchemy(app)
 
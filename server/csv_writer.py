@@ -0,0 +1,66 @@
+import csv
+import os
+import time
+
+class BufferedCsvWriter:
+    """
+    Appends (Timestamp, Value) rows to DATA_DIR/<date>.csv, the same files
+    write_mass_to_csv produces, while keeping the file open between samples.
+
+    Rows are buffered in memory and flushed once flush_rows are pending or
+    flush_interval seconds have passed since the last flush, optionally with
+    fsync. The file rotates when a sample's date differs from the open
+    file's, i.e. at midnight.
+    """
+
+    def __init__(self, data_dir, flush_rows=50, flush_interval=5.0, fsync=False, clock=time.monotonic):
+        self.data_dir = data_dir
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._clock = clock
+        self._rows = []
+        self._file = None
+        self._writer = None
+        self._day = None
+        self._last_flush = clock()
+        self.filename = None
+
+    def write(self, timestamp, value):
+        day = timestamp.date()
+        if day != self._day:
+            self._rotate(day)
+        self._rows.append((timestamp.isoformat(), value))
+        if (len(self._rows) >= self.flush_rows
+                or self._clock() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def _rotate(self, day):
+        self.close()
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.filename = os.path.join(self.data_dir, f"{day}.csv")
+        self._file = open(self.filename, 'a', newline='')
+        self._writer = csv.writer(self._file)
+        self._day = day
+        if self._file.tell() == 0:
+            self._writer.writerow(['Timestamp', 'Value'])
+
+    def flush(self):
+        if self._file is None:
+            return
+        if self._rows:
+            self._writer.writerows(self._rows)
+            self._rows.clear()
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._last_flush = self._clock()
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+        self._writer = None
+        self._day = None
@@ -0,0 +1,221 @@
+"""
+Query logic behind the /dashboard endpoint: time-window selection and
+downsampling of a loaded series into the {Timestamp, Value} rows the
+frontend plots, plus generators that stream a file's rows as JSON, NDJSON
+or CSV without loading it.
+"""
+import csv
+import json
+import math
+import struct
+from collections import namedtuple
+import numpy as np
+import downsample
+import rollups
+from series import parse_timestamp, format_timestamps
+
+# a selected window: int64 ns timestamps and float values, plus per-bucket
+# min/max/count for bucketed answers (None for raw samples)
+Columns = namedtuple("Columns", ["timestamps", "values", "min", "max", "count", "index"])
+
+BINARY_MAGIC = b"WSR1"
+BINARY_HEADER = struct.Struct("<4sIIIQ")  # 24 bytes, keeps the float64 arrays 8-byte aligned
+PACK_BUCKETS = 1
+
+STREAM_FORMATS = ("json", "ndjson")
+# rows per chunk handed to the WSGI server by the stream generators
+STREAM_CHUNK_ROWS = 1000
+
+def parse_query(args):
+    """
+    Read points/method/start/end from request args. Raises ValueError with a
+    message suitable for a 400 response.
+    """
+    points = args.get("points")
+    if points is not None and points != "":
+        try:
+            points = int(points)
+        except ValueError:
+            raise ValueError("points must be an integer.")
+        if points < 2:
+            raise ValueError("points must be at least 2.")
+    else:
+        points = None
+    method = args.get("method", "lttb")
+    if method not in downsample.METHODS:
+        raise ValueError(f"method must be one of {', '.join(downsample.METHODS)}.")
+    start = args.get("start") or None
+    end = args.get("end") or None
+    try:
+        start = parse_timestamp(start) if start else None
+        end = parse_timestamp(end) if end else None
+    except ValueError:
+        raise ValueError("start and end must be ISO-8601 timestamps.")
+    return {"points": points, "method": method, "start": start, "end": end}
+
+def select_window(timestamps, start=None, end=None):
+    """Slice bounds [lo, hi) of samples with start <= t <= end, for sorted timestamps."""
+    lo = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+    hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side="right"))
+    return lo, max(lo, hi)
+
+def window_indices(timestamps, start=None, end=None):
+    """Indices of the samples with start <= t <= end, in file order; timestamps may go backwards."""
+    if start is None and end is None:
+        return np.arange(len(timestamps))
+    if len(timestamps) > 1 and np.any(np.diff(timestamps) < 0):
+        mask = np.ones(len(timestamps), dtype=bool)
+        if start is not None:
+            mask &= timestamps >= start
+        if end is not None:
+            mask &= timestamps <= end
+        return np.flatnonzero(mask)
+    lo, hi = select_window(timestamps, start, end)
+    return np.arange(lo, hi)
+
+def select_columns(series, points=None, method="lttb", start=None, end=None):
+    """
+    Window and downsample a series. Returns (Columns, total) where total is
+    the number of samples in the window; Columns.index holds the picked
+    sample indices, or is None for mean buckets.
+    """
+    timestamps, values, labels = series
+    window = window_indices(timestamps, start, end)
+    total = len(window)
+
+    if points is None or total <= points:
+        return Columns(timestamps[window], values[window], None, None, None, window), total
+
+    # failed reads (NaN) carry nothing to plot and would poison the buckets
+    window = window[~np.isnan(values[window])]
+    x = timestamps[window]
+    y = values[window]
+    if method == "mean":
+        x_mean, y_mean, y_min, y_max, counts = downsample.mean_buckets(x, y, points)
+        return Columns(x_mean.astype(np.int64), y_mean, y_min, y_max, counts, None), total
+    if method == "minmax":
+        picked = downsample.minmax_indices(y, points)
+    else:
+        picked = downsample.lttb(x, y, points)
+    picked = window[picked]
+    return Columns(timestamps[picked], values[picked], None, None, None, picked), total
+
+def to_rows(columns, labels=None):
+    """{Timestamp, Value} dicts (plus Min/Max/Count for buckets); raw samples keep their CSV labels."""
+    if columns.index is not None and isinstance(labels, np.ndarray):
+        stamps = labels[columns.index].astype(str).tolist()  # series_cache's bytes labels
+    elif columns.index is not None and labels is not None:
+        stamps = [labels[i] for i in columns.index.tolist()]
+    else:
+        stamps = format_timestamps(columns.timestamps)
+    if columns.count is None:
+        return [{'Timestamp': ts, 'Value': v} for ts, v in zip(stamps, columns.values.tolist())]
+    return [{'Timestamp': ts, 'Value': v, 'Min': lo, 'Max': hi, 'Count': c}
+            for ts, v, lo, hi, c in zip(stamps, columns.values.tolist(), columns.min.tolist(),
+                                        columns.max.tolist(), columns.count.astype(np.int64).tolist())]
+
+def rollup_columns(root_dir, stems, points, method="lttb", start=None, end=None):
+    """
+    Answer method=mean from precomputed rollups: (Columns, total,
+    tier_seconds), or None when there are none, the window needs raw
+    samples or another method was asked for. lttb and minmax pick actual
+    samples, so they always come from the raw rows.
+    """
+    if method != "mean":
+        return None
+    result = rollups.query(root_dir, stems, points, start, end)
+    if result is None:
+        return None
+    records, width = result
+    counts = records["count"]
+    means = records["sum"] / np.maximum(counts, 1)
+    columns = Columns(records["bucket_ns"], means, records["min"], records["max"], counts, None)
+    return columns, int(counts.sum()), width
+
+def pack_columns(columns, total, tier=0):
+    """
+    Columns as one little-endian buffer for typed-array decoding:
+
+        BINARY_HEADER   magic b"WSR1", row count, flags, tier seconds (0 for
+                        raw samples), samples in the window
+        float64[count]  timestamps, ms on the recording's wall clock (the
+                        same clock as the ISO labels, no timezone applied)
+        float64[count]  values, NaN for failed reads
+        float64[count]  min, max and count columns when flags & PACK_BUCKETS
+    """
+    buckets = columns.count is not None
+    parts = [BINARY_HEADER.pack(BINARY_MAGIC, len(columns.timestamps), PACK_BUCKETS if buckets else 0,
+                                tier, total),
+             (np.asarray(columns.timestamps, dtype=np.int64) / 1e6).astype("<f8").tobytes(),
+             np.asarray(columns.values, dtype="<f8").tobytes()]
+    if buckets:
+        parts += [np.asarray(column, dtype="<f8").tobytes()
+                  for column in (columns.min, columns.max, columns.count)]
+    return b"".join(parts)
+
+def iter_rows(path, start=None, end=None):
+    """
+    (label, value) pairs straight from the CSV, one row at a time. value is
+    a float, or None for failed reads; rows outside [start, end] are skipped.
+    """
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        ts_col, value_col = header.index("Timestamp"), header.index("Value")
+        for row in reader:
+            if len(row) <= max(ts_col, value_col):
+                continue
+            label = row[ts_col]
+            if start is not None or end is not None:
+                try:
+                    timestamp = parse_timestamp(label)
+                except ValueError:
+                    continue
+                if (start is not None and timestamp < start) or (end is not None and timestamp > end):
+                    continue
+            try:
+                value = float(row[value_col])
+            except ValueError:
+                value = None  # "False" from a failed read
+            if value is not None and not math.isfinite(value):
+                value = None
+            yield label, value
+
+def _row_json(label, value):
+    return '{"Timestamp":%s,"Value":%s}' % (json.dumps(label), "null" if value is None else repr(value))
+
+def _chunked(lines):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= STREAM_CHUNK_ROWS:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+def stream_json(path, csv_files, start=None, end=None):
+    """The /dashboard JSON document, produced incrementally; total_points comes last."""
+    total = 0
+
+    def rows():
+        nonlocal total
+        for label, value in iter_rows(path, start, end):
+            yield ("," if total else "") + _row_json(label, value)
+            total += 1
+
+    yield '{"csv_files":%s,"data":[' % json.dumps(csv_files)
+    yield from _chunked(rows())
+    yield '],"total_points":%d}\n' % total
+
+def stream_ndjson(path, start=None, end=None):
+    """One {"Timestamp", "Value"} object per line."""
+    return _chunked(_row_json(label, value) + "\n" for label, value in iter_rows(path, start, end))
+
+def stream_csv(path, start=None, end=None):
+    """Timestamp,Value CSV of the rows inside [start, end]."""
+    yield "Timestamp,Value\n"
+    yield from _chunked(f"{label},{'False' if value is None else repr(value)}\n"
+                        for label, value in iter_rows(path, start, end))
@@ -0,0 +1,75 @@
+"""
+Reduce a (x, y) series to roughly n points for plotting.
+
+x is any increasing numeric array (timestamps in ns here) and y the
+values, without NaNs. lttb() and minmax_indices() return indices of the
+original samples to keep; mean_buckets() returns per-bucket aggregates.
+"""
+import numpy as np
+
+METHODS = ("lttb", "minmax", "mean")
+
+def _bucket_edges(size, buckets):
+    return np.linspace(0, size, buckets + 1).astype(np.int64)
+
+def lttb(x, y, n):
+    """Largest-Triangle-Three-Buckets: indices of n points that keep the visual shape."""
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size)
+    x = np.asarray(x, dtype=np.float64) - float(x[0])
+    y = np.asarray(y, dtype=np.float64)
+    # first and last points are fixed, the rest fall into n - 2 buckets
+    edges = _bucket_edges(size - 2, n - 2) + 1
+    selected = np.empty(n, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    for i in range(n - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = size - 1, size
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    selected[-1] = size - 1
+    return selected
+
+def minmax_indices(y, n):
+    """Indices of the min and max of each of n // 2 buckets, in time order."""
+    size = len(y)
+    buckets = max(1, n // 2)
+    if n >= size or buckets >= size:
+        return np.arange(size)
+    edges = _bucket_edges(size, buckets)
+    selected = np.empty(2 * buckets, dtype=np.int64)
+    for i in range(buckets):
+        start, end = edges[i], edges[i + 1]
+        chunk = y[start:end]
+        lo = start + int(np.argmin(chunk))
+        hi = start + int(np.argmax(chunk))
+        selected[2 * i], selected[2 * i + 1] = (lo, hi) if lo <= hi else (hi, lo)
+    return np.unique(selected)
+
+def mean_buckets(x, y, n):
+    """
+    Split into n equal-count buckets and return (x_mean, y_mean, y_min,
+    y_max, count) arrays, one entry per bucket.
+    """
+    size = len(x)
+    buckets = min(max(1, n), size)
+    if size == 0:
+        empty = np.zeros(0)
+        return empty, empty, empty, empty, np.zeros(0, dtype=np.int64)
+    starts = _bucket_edges(size, buckets)[:-1]
+    counts = np.diff(np.append(starts, size))
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    x0 = x[0]
+    x_mean = np.add.reduceat(x - x0, starts) / counts + x0
+    y_mean = np.add.reduceat(y, starts) / counts
+    return (x_mean, y_mean, np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts), counts)
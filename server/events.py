@@ -0,0 +1,180 @@
+"""
+Online weight-event detection: things landing on or leaving the scale.
+
+StepDetector sees every sample once and keeps only a rolling window of
+the last `window` values plus their running sum and sum of squares, so
+each update is O(1). The window is settled when its standard deviation is
+within `tolerance`; the scale's level is then the window mean. Between two
+settled windows the detector reports
+
+- "settled": the first plateau after it started,
+- "step": the new plateau differs from the old one by at least `step`
+  (a load added or removed),
+- "transient": the level came back to within `step` of where it was, but
+  the samples strayed at least `step` from it on the way (a knock, a hand
+  on the pan).
+
+Smaller wobbles produce no event at all. Events are appended to one CSV
+per day under data/events:
+
+    Kind,Start,End,Before,After,Peak
+    step,2025-06-11T14:02:11.204113,2025-06-11T14:02:14.708254,0.12,251.87,255.3
+
+Start is the first sample that left the old level, End the first sample
+of the new plateau, Peak the sample furthest from the old level in
+between. New events also go to broadcast subscribers as "weight_event"
+Server-Sent Events (see sse_event).
+"""
+import collections
+import csv
+import datetime
+import json
+import math
+import os
+from timeseries_store import to_ns, from_ns
+
+EVENT_KINDS = ("settled", "step", "transient")
+HEADER = ["Kind", "Start", "End", "Before", "After", "Peak"]
+
+class StepDetector:
+    def __init__(self, window=8, tolerance=5.0, step=20.0):
+        if window < 2:
+            raise ValueError("window must be at least 2 samples")
+        self.window = window
+        self.tolerance = tolerance
+        self.step = step
+        self._values = collections.deque(maxlen=window)
+        self._timestamps = collections.deque(maxlen=window)
+        self.reset()
+
+    def reset(self):
+        self._values.clear()
+        self._timestamps.clear()
+        # sums of value - _shift, which keeps them small next to raw-count levels
+        self._shift = None
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self.level = None
+        self._moving_since = None
+        self._peak = None
+
+    def update(self, timestamp_ns, value):
+        """Feed one sample; returns an event dict when it completes one, else None."""
+        if value is None or value is False or math.isnan(value):
+            return None
+        if self._shift is None:
+            self._shift = value
+        x = value - self._shift
+        if len(self._values) == self.window:
+            old = self._values[0]
+            self._sum -= old
+            self._sumsq -= old * old
+        self._values.append(x)
+        self._timestamps.append(timestamp_ns)
+        self._sum += x
+        self._sumsq += x * x
+
+        if self.level is not None:
+            deviation = abs(value - self.level)
+            if self._moving_since is None and deviation > self.tolerance:
+                self._moving_since = timestamp_ns
+                self._peak = value
+            elif self._moving_since is not None and deviation > abs(self._peak - self.level):
+                self._peak = value
+
+        if len(self._values) < self.window:
+            return None
+        n = self.window
+        mean = self._sum / n
+        variance = max(0.0, (self._sumsq - self._sum * mean) / (n - 1))
+        if variance > self.tolerance * self.tolerance:
+            return None
+        return self._settle(mean + self._shift)
+
+    def _settle(self, level):
+        before, self.level = self.level, level
+        if before is None:
+            return self._event("settled", self._timestamps[0], self._timestamps[0], None, level, level)
+        if self._moving_since is None:
+            # still on the same plateau; follow slow drift
+            return None
+        start, peak = self._moving_since, self._peak
+        self._moving_since = self._peak = None
+        if abs(level - before) >= self.step:
+            kind = "step"
+        elif abs(peak - before) >= self.step:
+            kind = "transient"
+        else:
+            return None
+        return self._event(kind, start, self._timestamps[0], before, level, peak)
+
+    def _event(self, kind, start, end, before, after, peak):
+        return {"kind": kind, "start": start, "end": end, "before": before, "after": after, "peak": peak}
+
+def _format_value(value):
+    return "" if value is None else round(value, 6)
+
+def _parse_value(value):
+    return float(value) if value != "" else None
+
+class EventLog:
+    """Appends events to <directory>/<date>.csv, the date being the event's start."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def write(self, event):
+        os.makedirs(self.directory, exist_ok=True)
+        start = from_ns(event["start"])
+        path = os.path.join(self.directory, f"{start.date()}.csv")
+        write_header = not os.path.exists(path)
+        with open(path, "a", newline="") as f:
+            writer = csv.writer(f)
+            if write_header:
+                writer.writerow(HEADER)
+            writer.writerow([event["kind"], start.isoformat(), from_ns(event["end"]).isoformat(),
+                             _format_value(event["before"]), _format_value(event["after"]),
+                             _format_value(event["peak"])])
+
+def read_events(directory, start=None, end=None, kinds=None):
+    """Logged events (timestamps in ns) that start within [start, end], oldest first."""
+    if not os.path.isdir(directory):
+        return []
+    first = str(from_ns(start).date()) if start is not None else None
+    last = str(from_ns(end).date()) if end is not None else None
+    events = []
+    for name in sorted(os.listdir(directory)):
+        day = name[:-4]
+        if not name.endswith(".csv") or (first and day < first) or (last and day > last):
+            continue
+        with open(os.path.join(directory, name), newline="") as f:
+            for row in csv.reader(f):
+                if len(row) != len(HEADER) or row == HEADER:
+                    continue
+                try:
+                    event = {"kind": row[0],
+                             "start": to_ns(datetime.datetime.fromisoformat(row[1])),
+                             "end": to_ns(datetime.datetime.fromisoformat(row[2])),
+                             "before": _parse_value(row[3]), "after": _parse_value(row[4]),
+                             "peak": _parse_value(row[5])}
+                except ValueError:
+                    continue  # a row cut short by a crash
+                if ((start is None or event["start"] >= start) and (end is None or event["start"] <= end)
+                        and (kinds is None or event["kind"] in kinds)):
+                    events.append(event)
+    events.sort(key=lambda event: event["start"])
+    return events
+
+def event_json(event):
+    data = dict(event)
+    data["start"] = from_ns(event["start"]).isoformat()
+    data["end"] = from_ns(event["end"]).isoformat()
+    return data
+
+def sse_event(item, dropped):
+    """broadcast.sse_stream renderer for (seq, event) items."""
+    seq, event = item
+    data = event_json(event)
+    if dropped:
+        data["dropped"] = dropped
+    return f"id: {seq}\nevent: weight_event\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,90 @@
+"""
+Stand-in for Picamera2 so VideoStreamer and /video_feed run on machines
+without a camera (VIDEO_BACKEND=fake).
+
+Implements the part of the Picamera2 API VideoStreamer uses. Frames are a
+moving gradient with a frame counter, delivered at `fps` on a monotonic
+clock; start_encoder() pushes OpenCV-encoded JPEGs to the output the way
+Picamera2's MJPEGEncoder does.
+"""
+import threading
+import time
+import cv2
+import numpy as np
+
+class FakeEncoder:
+    def __init__(self, **options):
+        self.options = options
+
+class FakeCamera:
+    encoder_classes = {"mjpeg": FakeEncoder, "jpeg": FakeEncoder}
+
+    def __init__(self, fps=30.0):
+        self.fps = fps
+        self.size = (640, 480)
+        self.frames = 0
+        self._next = None
+        self._lock = threading.Lock()
+        self._encoders = {}
+
+    def create_video_configuration(self, main=None, **options):
+        return {"main": main or {"size": self.size, "format": "RGB888"}, **options}
+
+    def configure(self, config):
+        self.size = tuple(config["main"]["size"])
+        self.fps = config.get("controls", {}).get("FrameRate", self.fps)
+
+    def start(self):
+        self._next = time.monotonic()
+
+    def stop(self):
+        for encoder in list(self._encoders):
+            self.stop_encoder(encoder)
+
+    def close(self):
+        pass
+
+    def _make_frame(self):
+        width, height = self.size
+        with self._lock:
+            self.frames += 1
+            number = self.frames
+        row = ((np.arange(width) + number * 4) % 256).astype(np.uint8)
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[:] = row[None, :, None]
+        cv2.putText(frame, str(number), (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 255), 3)
+        return frame
+
+    def _pace(self):
+        # block until the next frame is due, like the sensor delivering frames
+        now = time.monotonic()
+        if self._next is None or self._next < now - 1.0:
+            self._next = now
+        if self._next > now:
+            time.sleep(self._next - now)
+        self._next += 1.0 / self.fps
+
+    def capture_array(self, name="main"):
+        self._pace()
+        return self._make_frame()
+
+    def start_encoder(self, encoder, output, name="main"):
+        stop = threading.Event()
+
+        def run():
+            next_frame = time.monotonic()
+            while not stop.is_set():
+                next_frame += 1.0 / self.fps
+                ret, jpeg = cv2.imencode('.jpg', self._make_frame())
+                if ret:
+                    output.outputframe(jpeg.tobytes(), True, time.monotonic_ns() // 1000)
+                stop.wait(max(0.0, next_frame - time.monotonic()))
+
+        thread = threading.Thread(target=run, name="fake-encoder", daemon=True)
+        self._encoders[encoder] = (stop, thread)
+        thread.start()
+
+    def stop_encoder(self, encoder=None):
+        stop, thread = self._encoders.pop(encoder)
+        stop.set()
+        thread.join(timeout=1.0)
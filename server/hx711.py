@@ -8,6 +8,8 @@ import time
 
 import RPi.GPIO as GPIO
 
+import hx711_filters
+
 
 class HX711:
     """
@@ -246,7 +248,8 @@ class HX711:
 
         Args:
             data_filter(data_filter): Data filter that takes list of int numbers and
-                returns a list of filtered int numbers.
+                returns a list of filtered int numbers. Filters from hx711_filters
+                take and return an int32 numpy array instead.
         
         Raises:
             TypeError: if filter is not a function.
@@ -442,7 +445,15 @@ class HX711:
         for _ in range(readings):
             data_list.append(self._read())
         data_mean = False
-        if readings > 2 and self._data_filter:
+        if readings > 2 and getattr(self._data_filter, 'vectorized', False):
+            # numpy path, avoids statistics.mean working in Fractions
+            data_mean = hx711_filters.mean(data_list, self._data_filter)
+            if data_mean is False:
+                return False
+            if self._debug_mode:
+                print('data_list: {}'.format(data_list))
+                print('data_mean:', data_mean)
+        elif readings > 2 and self._data_filter:
             filtered_data = self._data_filter(data_list)
             if not filtered_data:
                 return False
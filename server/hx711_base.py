@@ -0,0 +1,158 @@
+import time
+import statistics as stat
+from collections import namedtuple
+import hx711_filters
+
+# One averaged batch of conversions: raw mean, offset-corrected value and weight
+Reading = namedtuple("Reading", ["raw", "data", "weight", "offset", "scale", "channel"])
+
+class HX711Base:
+    """
+    Channel/gain bookkeeping, averaging, tare and scale logic shared by every
+    HX711 backend. Subclasses only provide _read(), which returns a signed
+    24-bit int or False for an invalid conversion.
+    """
+
+    # after changing channel or gain the first conversions are garbage
+    _settle_time = 0.5
+
+    def __init__(self, gain=128):
+        self.gain = gain
+        self.offset = 0
+        self.scale = 1
+        self._gain_channel_A = gain
+        self._offset_A_128 = 0
+        self._offset_A_64 = 0
+        self._offset_B = 0
+        self._wanted_channel = 'A'
+        self._current_channel = ''
+        self._scale_ratio_A_128 = 1
+        self._scale_ratio_A_64 = 1
+        self._scale_ratio_B = 1
+        self._debug_mode = False
+        self._data_filter = self.outliers_filter
+
+    def _read(self):
+        raise NotImplementedError
+
+    def select_channel(self, channel):
+        channel = channel.capitalize()
+        if channel not in ('A', 'B'):
+            raise ValueError('Channel must be "A" or "B"')
+        self._wanted_channel = channel
+        self._read()
+        time.sleep(self._settle_time)
+
+    def set_gain_A(self, gain):
+        if gain not in (128, 64, 32):
+            raise ValueError("Gain must be 128, 64, or 32")
+        self._gain_channel_A = gain
+        self.gain = gain
+
+    @property
+    def gain_pulses(self):
+        if self._wanted_channel == 'A':
+            return 1 if self._gain_channel_A == 128 else 3
+        else:
+            return 2
+
+    def set_data_filter(self, data_filter):
+        """
+        Set the outlier filter applied to each batch. List filters take and
+        return a list of ints; filters tagged by hx711_filters.vectorized take
+        and return an int32 NumPy array and are averaged with NumPy.
+        """
+        if not callable(data_filter):
+            raise TypeError(f'data_filter must be callable. Received: {data_filter}')
+        self._data_filter = data_filter
+
+    def get_data_filter(self):
+        return self._data_filter
+
+    def get_raw_data_mean(self, readings=30):
+        data_list = [self._read() for _ in range(readings)]
+        if getattr(self._data_filter, 'vectorized', False):
+            result = hx711_filters.mean(data_list, self._data_filter)
+            if result is False: return False
+            return int(result)
+        # False is an int subclass, so test for it explicitly
+        data = [num for num in data_list if num is not False]
+        if not data: return False
+        filtered = self._data_filter(data)
+        if not filtered: return False
+        return int(stat.mean(filtered))
+
+    def _current_calibration(self):
+        if self._current_channel == 'A' and self._gain_channel_A == 128:
+            return self._offset_A_128, self._scale_ratio_A_128
+        elif self._current_channel == 'A' and self._gain_channel_A == 64:
+            return self._offset_A_64, self._scale_ratio_A_64
+        else:
+            return self._offset_B, self._scale_ratio_B
+
+    def get_reading(self, readings=30):
+        """
+        Read one batch and return raw mean, offset-corrected value and weight
+        together as a Reading, or False if no conversion in the batch was valid.
+        """
+        result = self.get_raw_data_mean(readings)
+        if result is False: return False
+        return self._make_reading(result)
+
+    def get_filtered_reading(self, stream_filter):
+        """
+        Read a single conversion, pass it through stream_filter (see
+        stream_filters.py) and return the filtered Reading, or False if the
+        conversion was invalid. raw is the filtered value rounded to counts.
+        """
+        result = self._read()
+        if result is False: return False
+        filtered = stream_filter.update(result)
+        return self._make_reading(filtered)._replace(raw=round(filtered))
+
+    def _make_reading(self, result):
+        offset, scale = self._current_calibration()
+        return Reading(result, result - offset, float((result - offset) / scale),
+                       offset, scale, self._current_channel)
+
+    def get_data_mean(self, readings=30):
+        reading = self.get_reading(readings)
+        if reading is False: return False
+        return reading.data
+
+    def get_weight_mean(self, readings=30):
+        reading = self.get_reading(readings)
+        if reading is False: return False
+        return reading.weight
+
+    def outliers_filter(self, data_list, stdev_thresh=1.0):
+        if not data_list: return []
+        median = stat.median(data_list)
+        dists = [abs(x - median) for x in data_list]
+        stdev = stat.stdev(dists) if len(dists) > 1 else 0
+        if not stdev: return [median]
+        return [x for x, d in zip(data_list, dists) if d / stdev < stdev_thresh]
+
+    def tare(self, readings=30):
+        result = self.get_raw_data_mean(readings)
+        if result is False: return True
+        if self._current_channel == 'A' and self._gain_channel_A == 128:
+            self._offset_A_128 = result
+            self.offset = result
+        elif self._current_channel == 'A' and self._gain_channel_A == 64:
+            self._offset_A_64 = result
+            self.offset = result
+        elif self._current_channel == 'B':
+            self._offset_B = result
+            self.offset = result
+        else:
+            return True
+        return False
+
+    def set_scale(self, scale):
+        if self.gain == 128:
+            self._scale_ratio_A_128 = scale
+            self.scale = scale
+        elif self.gain == 64:
+            self._scale_ratio_A_128 = scale
+            self.scale = scale
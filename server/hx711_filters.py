@@ -0,0 +1,94 @@
+"""
+NumPy-backed outlier filters for HX711 batches.
+
+Every filter takes an int32 array of valid raw conversions and returns the
+subset to average. They are tagged as vectorized so HX711.get_raw_data_mean
+hands them an array instead of a list and averages with NumPy, not
+statistics.mean (which works in Fractions).
+
+    hx.set_data_filter(hx711_filters.make_filter("mad", thresh=3.0))
+"""
+import functools
+import numpy as np
+
+def vectorized(data_filter):
+    data_filter.vectorized = True
+    return data_filter
+
+@vectorized
+def outliers_filter(data, stdev_thresh=1.0):
+    """Same rule as HX711.outliers_filter: keep reads closer to the median than stdev_thresh
+    standard deviations of the distances from the median."""
+    if data.size == 0:
+        return data
+    median = np.median(data)
+    dists = np.abs(data - median)
+    stdev = dists.std(ddof=1) if dists.size > 1 else 0.0
+    if not stdev:
+        return np.array([median])
+    return data[dists / stdev < stdev_thresh]
+
+@vectorized
+def mad_filter(data, thresh=3.0):
+    """Keep reads within thresh robust sigmas (1.4826 * median absolute deviation) of the median."""
+    if data.size == 0:
+        return data
+    median = np.median(data)
+    dists = np.abs(data - median)
+    mad = np.median(dists)
+    if not mad:
+        return data[dists == 0] if np.any(dists == 0) else np.array([median])
+    return data[dists <= thresh * 1.4826 * mad]
+
+@vectorized
+def trimmed_filter(data, proportion=0.1):
+    """Drop the lowest and highest `proportion` of reads; the mean of the rest is a trimmed mean."""
+    if not 0.0 <= proportion < 0.5:
+        raise ValueError("proportion must be in [0, 0.5)")
+    cut = int(data.size * proportion)
+    if cut == 0:
+        return data
+    return np.partition(data, (cut, data.size - cut - 1))[cut:data.size - cut]
+
+@vectorized
+def sigma_clip_filter(data, sigma=2.0, iterations=3):
+    """Iteratively drop reads more than `sigma` standard deviations from the mean."""
+    for _ in range(iterations):
+        if data.size < 3:
+            break
+        std = data.std()
+        if not std:
+            break
+        keep = np.abs(data - data.mean()) <= sigma * std
+        if keep.all():
+            break
+        data = data[keep]
+    return data
+
+FILTERS = {
+    "outliers": outliers_filter,
+    "mad": mad_filter,
+    "trimmed": trimmed_filter,
+    "sigma_clip": sigma_clip_filter,
+}
+
+def make_filter(name, **params):
+    """Return the named filter with its parameters bound, ready for set_data_filter."""
+    try:
+        data_filter = FILTERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown data filter: {name}. Options: {', '.join(FILTERS)}")
+    if not params:
+        return data_filter
+    return vectorized(functools.partial(data_filter, **params))
+
+def mean(data_list, data_filter):
+    """Mean of the valid (non-False) reads in data_list after data_filter, or False."""
+    data = np.array([num for num in data_list if num is not False and num is not True],
+                    dtype=np.int32)
+    if data.size == 0:
+        return False
+    filtered = data_filter(data)
+    if filtered.size == 0:
+        return False
+    return float(filtered.mean())
@@ -0,0 +1,87 @@
+import os
+import time
+import random
+from hx711_base import HX711Base
+
+class SimulatedHX711(HX711Base):
+    """
+    Software HX711 for running and benchmarking the server without GPIO.
+
+    Raw counts are zero_level + signal (scaled by gain) + drift * elapsed
+    seconds + gaussian noise. A fraction of conversions (dropout) returns
+    False like a bad read on the real chip. With realtime=True each read
+    waits one conversion period of the selected output rate (10 or 80 SPS).
+    """
+
+    _settle_time = 0
+
+    def __init__(self, dout_pin=None, pd_sck_pin=None, chip=None, gain=128, select_channel='A',
+                 zero_level=433000, signal=0, noise=20.0, drift=0.0, dropout=0.0,
+                 rate=80, realtime=False, seed=None):
+        super().__init__(gain)
+        if rate not in (10, 80):
+            raise ValueError("Rate must be 10 or 80 samples per second")
+        if not 0.0 <= dropout < 1.0:
+            raise ValueError("Dropout must be in [0, 1)")
+        self.zero_level = zero_level
+        self.signal = signal
+        self.noise = noise
+        self.drift = drift
+        self.dropout = dropout
+        self.rate = rate
+        self.realtime = realtime
+        self.reads = 0
+        self._rng = random.Random(seed)
+        self._start = time.monotonic()
+        self._next_conversion = self._start
+        self.select_channel(select_channel)
+        self.set_gain_A(gain)
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """Build a simulator from HX711_SIM_* environment variables."""
+        env = os.environ
+        params = {
+            "zero_level": int(env.get("HX711_SIM_ZERO", 433000)),
+            "signal": float(env.get("HX711_SIM_SIGNAL", 0)),
+            "noise": float(env.get("HX711_SIM_NOISE", 20.0)),
+            "drift": float(env.get("HX711_SIM_DRIFT", 0.0)),
+            "dropout": float(env.get("HX711_SIM_DROPOUT", 0.0)),
+            "rate": int(env.get("HX711_SIM_RATE", 80)),
+            "realtime": env.get("HX711_SIM_REALTIME", "1") not in ("0", "false", "False", ""),
+            "seed": int(env["HX711_SIM_SEED"]) if env.get("HX711_SIM_SEED") else None,
+        }
+        params.update(kwargs)
+        return cls(**params)
+
+    def set_signal(self, signal):
+        """Set the load on the simulated cell, in raw counts at gain 128."""
+        self.signal = signal
+
+    def _wait_conversion(self):
+        now = time.monotonic()
+        if now < self._next_conversion:
+            time.sleep(self._next_conversion - now)
+            now = self._next_conversion
+        self._next_conversion = now + 1.0 / self.rate
+
+    def _read(self):
+        if self.realtime:
+            self._wait_conversion()
+        self.reads += 1
+        if self._wanted_channel == 'A':
+            self._current_channel = 'A'
+            gain = self._gain_channel_A
+        else:
+            self._current_channel = 'B'
+            gain = 32
+        if self.dropout and self._rng.random() < self.dropout:
+            return False
+        elapsed = time.monotonic() - self._start
+        value = (self.zero_level + self.signal * gain / 128 + self.drift * elapsed
+                 + self._rng.gauss(0.0, self.noise))
+        value = int(round(value))
+        # the real chip saturates at the 24-bit rails, which _read rejects
+        if value >= 0x7fffff or value <= -0x800000:
+            return False
+        return value
@@ -1,4 +1,4 @@
-from flask import request, jsonify, Response
+from flask import request, jsonify, Response, send_file
 from config import app, db
 from models import Contact, User
 from video_streamer import VideoStreamer, CameraBusyException
@@ -7,29 +7,57 @@ from sensor import (
     calibrate_status, set_hx, load_calibration_ratio
 )
 import sensor
-from hx711_gpiod import HX711
-import csv
 import os
 import time
 import threading
 from thread_report import report_gpiochip0_users
+from series_cache import SeriesCache
+from broadcast import sse_stream, RingBridge
+from dashboard import (
+    parse_query, select_columns, rollup_columns, to_rows, pack_columns,
+    STREAM_FORMATS, stream_json, stream_ndjson, stream_csv
+)
+from range_query import days_in_range, read_range
+from events import EVENT_KINDS, read_events, event_json, sse_event
+from video_timeline import frames_between, frame_time, frame_index_path, nearest_sample
+from timeseries_store import from_ns
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+VIDEO_DIR = os.path.join(DATA_DIR, 'videos')
+RESPONSE_FORMATS = ("json", "binary")
+# parsed CSVs shared by /dashboard and /list-csv requests
+series_cache = SeriesCache(app.config["DASHBOARD_CACHE_MB"] * 1024 * 1024)
 
 # --- Video state ---
 video_lock = threading.Lock()
 video_streamer = None
 video_mode = None  # None, 'livestream', or 'record'
-video_filename = None
+video_filename = None  # recording's segment prefix; segments are <prefix>-YYYYmmdd-HHMMSS.avi
 
 # -- Sensor thread --
 sensor_thread = None
+acquisition = None  # acquisition.AcquisitionProcess when SENSOR_ACQUISITION == "process"
+ring_bridge = None  # broadcast.RingBridge feeding /sensor/stream from the acquisition ring
 
 # --- Instantiate HX711 and inject into sensor module ---
 DOUT_PIN = 21
 PD_SCK_PIN = 20
 GPIO_CHIP = '/dev/gpiochip0'
-hx = HX711(dout_pin=DOUT_PIN, pd_sck_pin=PD_SCK_PIN, chip=GPIO_CHIP)
+
+def create_hx711(backend):
+    if backend == "sim":
+        from hx711_sim import SimulatedHX711
+        print("[DEBUG] Using simulated HX711 backend.")
+        return SimulatedHX711.from_env(dout_pin=DOUT_PIN, pd_sck_pin=PD_SCK_PIN)
+    if backend != "gpiod":
+        raise ValueError(f"Unknown HX711 backend: {backend}")
+    from hx711_gpiod import HX711
+    return HX711(dout_pin=DOUT_PIN, pd_sck_pin=PD_SCK_PIN, chip=GPIO_CHIP)
+
+hx = create_hx711(app.config["HX711_BACKEND"])
+if app.config["HX711_FILTER"]:
+    from hx711_filters import make_filter
+    hx.set_data_filter(make_filter(app.config["HX711_FILTER"]))
 
 # Load calibration on startup
 calibration_ratio = load_calibration_ratio()
@@ -38,6 +66,23 @@ if calibration_ratio is not None:
     print(f"[DEBUG] Loaded and applied calibration ratio on startup: {calibration_ratio}")
 
 set_hx(hx)  # Make hx available in sensor module
+sensor.set_sample_rate(app.config["SENSOR_SAMPLE_RATE_HZ"], app.config["SENSOR_SCHEDULE_POLICY"])
+sensor.csv_writer_options.update(
+    flush_rows=app.config["SENSOR_CSV_FLUSH_ROWS"],
+    flush_interval=app.config["SENSOR_CSV_FLUSH_INTERVAL"],
+    fsync=app.config["SENSOR_CSV_FSYNC"],
+)
+sensor.binary_store_enabled = app.config["SENSOR_BINARY_STORE"]
+sensor.rollups_enabled = app.config["SENSOR_ROLLUPS"]
+if app.config["SENSOR_STREAM_FILTER"]:
+    from stream_filters import make_stream_filter
+    sensor.stream_filter = make_stream_filter(app.config["SENSOR_STREAM_FILTER"])
+sensor.events_enabled = app.config["SENSOR_EVENTS"]
+sensor.event_detector_options.update(
+    window=app.config["SENSOR_EVENT_WINDOW"],
+    tolerance=app.config["SENSOR_EVENT_TOLERANCE"],
+    step=app.config["SENSOR_EVENT_STEP"],
+)
 
 @app.route("/register", methods=["POST"])
 def register():
@@ -143,16 +188,33 @@ def list_csv():
         os.makedirs(DATA_DIR)
 
     # List only .csv files
-    csv_files = [f for f in os.listdir(DATA_DIR) if f.endswith('.csv')]
+    csv_files = series_cache.list_csv(DATA_DIR)
     return jsonify({"files": csv_files})
 
 
 @app.route("/dashboard", methods=["GET"])
 def dashboard():
+    """
+    Optional query parameters:
+        points: downsample to about this many points (default: every row)
+        method: lttb (default), minmax or mean buckets
+        start, end: ISO-8601 bounds of the time window
+        stream: json or ndjson to stream every row of the window straight
+            from the file instead of building the response in memory
+            (points and method are ignored)
+        format: json (default) or binary, a packed little-endian
+            timestamp/value buffer (see dashboard.pack_columns)
+
+    With points set and method=mean, the answer comes from the coarsest
+    rollup tier that still has at least that many buckets in the window
+    (mean rows with Min/Max/Count, "tier" gives the bucket width in
+    seconds); other methods, and windows that need sub-second resolution,
+    are downsampled from the raw rows.
+    """
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
 
-    csv_files = [f for f in os.listdir(DATA_DIR) if f.endswith('.csv')]
+    csv_files = series_cache.list_csv(DATA_DIR)
 
     # Get filename from query parameter, default to first csv file if not present
     filename = request.args.get('file')
@@ -161,22 +223,107 @@ def dashboard():
             filename = csv_files[0]
         else:
             return jsonify({"data": [], "csv_files": []})
-    
 
-    data = []
-    with open(os.path.join(DATA_DIR, filename), newline='') as csvfile:
-            reader = csv.DictReader(csvfile)
-            # Adapt to your column names, here we assume 'Timestamp' and 'Value'
-            for row in reader:
-                data.append({
-                    'Timestamp': row['Timestamp'],
-                    'Value': float(row['Value'])
-                })
-    return jsonify({"data": data, "csv_files": csv_files})
+    try:
+        query = parse_query(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    stream = request.args.get("stream")
+    if stream:
+        if stream not in STREAM_FORMATS:
+            return jsonify({"message": f"stream must be one of {', '.join(STREAM_FORMATS)}."}), 400
+        path = os.path.join(DATA_DIR, filename)
+        if stream == "ndjson":
+            return Response(stream_ndjson(path, query["start"], query["end"]), mimetype="application/x-ndjson")
+        return Response(stream_json(path, csv_files, query["start"], query["end"]), mimetype="application/json")
+
+    response_format = request.args.get("format", "json")
+    if response_format not in RESPONSE_FORMATS:
+        return jsonify({"message": "format must be json or binary."}), 400
+
+    rolled = None
+    if query["points"] is not None:
+        rolled = rollup_columns(sensor.ROLLUP_DIR, [filename[:-4]], **query)
+    if rolled is not None:
+        return series_response(*rolled, None, response_format, csv_files=csv_files)
+    series = series_cache.load(os.path.join(DATA_DIR, filename))
+    columns, total = select_columns(series, **query)
+    return series_response(columns, total, 0, series.labels, response_format, csv_files=csv_files)
+
+@app.route("/dashboard/range", methods=["GET"])
+def dashboard_range():
+    """
+    Samples between start and end across all daily recordings, e.g.
+    /dashboard/range?start=2025-06-11T14:00&end=2025-06-11T14:30. Takes the
+    same points, method and format parameters as /dashboard; the response
+    lists the days it drew from.
+    """
+    try:
+        query = parse_query(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    if query["start"] is None or query["end"] is None:
+        return jsonify({"message": "start and end are required."}), 400
+    response_format = request.args.get("format", "json")
+    if response_format not in RESPONSE_FORMATS:
+        return jsonify({"message": "format must be json or binary."}), 400
+
+    days = days_in_range(DATA_DIR, sensor.SERIES_DIR, query["start"], query["end"])
+    rolled = None
+    if query["points"] is not None:
+        rolled = rollup_columns(sensor.ROLLUP_DIR, days, **query)
+    if rolled is not None:
+        return series_response(*rolled, None, response_format, days=days)
+    series = read_range(DATA_DIR, sensor.SERIES_DIR, query["start"], query["end"])
+    columns, total = select_columns(series, query["points"], query["method"])
+    return series_response(columns, total, 0, series.labels, response_format, days=days)
+
+def series_response(columns, total, tier, labels, response_format, **extra):
+    """JSON rows or the packed buffer; tier is the rollup width in seconds, 0 for raw samples."""
+    if response_format == "binary":
+        return Response(pack_columns(columns, total, tier), mimetype="application/octet-stream")
+    response = {"data": to_rows(columns, labels), **extra, "total_points": total}
+    if tier:
+        response["tier"] = tier
+    return jsonify(response)
+
+@app.route("/download-csv", methods=["GET"])
+def download_csv():
+    """
+    The recorded CSV as a download, sent from disk in blocks. With start
+    and/or end, only the rows inside that window are streamed.
+    """
+    filename = request.args.get('file')
+    if not os.path.exists(DATA_DIR) or filename not in series_cache.list_csv(DATA_DIR):
+        return jsonify({"message": "File not found."}), 404
+    try:
+        query = parse_query(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    path = os.path.join(DATA_DIR, filename)
+    if query["start"] is None and query["end"] is None:
+        return send_file(path, mimetype="text/csv", as_attachment=True, download_name=filename)
+    return Response(stream_csv(path, query["start"], query["end"]), mimetype="text/csv",
+                    headers={"Content-Disposition": f"attachment; filename={filename}"})
 
 # Sensor Calibration API (multi-step for frontend)
+def acquisition_conflict():
+    """
+    409 response while an acquisition process is sampling: it inherited this
+    process's HX711 and GPIO line request, and calibration reads from here
+    would clock DOUT/SCK at the same time as the child's, corrupting both.
+    """
+    if acquisition is not None and acquisition.is_alive():
+        return jsonify({"message": "Stop the sensor loop before calibrating; the acquisition process is reading the HX711.",
+                        "step": calibrate_status()["step"]}), 409
+    return None
+
 @app.route('/sensor/calibrate/start', methods=['POST'])
 def api_calibrate_start():
+    conflict = acquisition_conflict()
+    if conflict:
+        return conflict
     if calibrate_start():
         return jsonify({"message": calibrate_status()["message"], "step": calibrate_status()["step"]}), 200
     else:
@@ -184,6 +331,9 @@ def api_calibrate_start():
 
 @app.route('/sensor/calibrate/read_weight', methods=['POST'])
 def api_calibrate_weight_read():
+    conflict = acquisition_conflict()
+    if conflict:
+        return conflict
     if calibrate_weight_read():
         return jsonify({"message": calibrate_status()["message"], "step": calibrate_status()["step"]}), 200
     else:
@@ -191,6 +341,10 @@ def api_calibrate_weight_read():
 
 @app.route('/sensor/calibrate/set_known_weight', methods=['POST'])
 def api_calibrate_set_known_weight():
+    # the new scale would only reach this process's hx, not the child's
+    conflict = acquisition_conflict()
+    if conflict:
+        return conflict
     weight = request.json.get("weight")
     if calibrate_set_known_weight(weight):
         return jsonify({"message": calibrate_status()["message"], "step": calibrate_status()["step"]}), 200
@@ -204,32 +358,65 @@ def api_calibrate_status():
 # Sensor recoding thread control
 @app.route('/sensor/start', methods=['POST'])
 def start_sensor_loop():
-    global sensor_thread
+    global sensor_thread, acquisition, ring_bridge
     if sensor.sensor_thread_event.is_set():
         return jsonify({"message": "Sensor reading loop already running."}), 400
-    print("[DEBUG] /sensor/start: Creating and starting sensor thread...")
+    data = request.get_json(silent=True) or {}
+    if "rate_hz" in data or "policy" in data:
+        try:
+            sensor.set_sample_rate(data.get("rate_hz", sensor.sample_rate_hz), data.get("policy"))
+        except (TypeError, ValueError) as e:
+            return jsonify({"message": str(e)}), 400
     sensor.sensor_thread_running = True
     sensor.sensor_thread_event.set()
-    sensor_thread = threading.Thread(target=sensor.read_sensor_loop, daemon=True)
-    sensor_thread.start()
+    if app.config["SENSOR_ACQUISITION"] == "process":
+        from acquisition import AcquisitionProcess
+        print("[DEBUG] /sensor/start: Starting acquisition process...")
+        acquisition = AcquisitionProcess(cpu=app.config["SENSOR_CPU"],
+                                         priority=app.config["SENSOR_RT_PRIORITY"])
+        acquisition.start()
+        sensor.attach_sample_ring(acquisition.ring)
+        # the acquisition process only samples; events are detected here
+        sensor.start_event_detection()
+        on_sample = sensor.detect_events if sensor.event_detector is not None else None
+        ring_bridge = RingBridge(acquisition.ring, sensor.sample_broadcaster, on_sample=on_sample)
+        ring_bridge.start()
+    else:
+        print("[DEBUG] /sensor/start: Creating and starting sensor thread...")
+        sensor_thread = threading.Thread(target=sensor.read_sensor_loop, daemon=True)
+        sensor_thread.start()
     return jsonify({"message": "Sensor reading loop started."}), 200
 
 @app.route('/sensor/stop', methods=['POST'])
 def stop_sensor_loop():
-    global sensor_thread
+    global sensor_thread, acquisition, ring_bridge
     if not sensor.sensor_thread_event.is_set():
         return jsonify({"message": "Sensor is not running."}), 400
     # Set a flag to stop the loop (implement this in your read_sensor_loop)
     sensor.sensor_thread_event.clear()
+    if sensor_thread is not None:
+        # let the loop flush and close today's CSV before reporting its name
+        sensor_thread.join(timeout=5)
     sensor_thread = None
+    if acquisition is not None:
+        acquisition.stop()
+        ring_bridge.stop()
+        ring_bridge = None
+        sensor.attach_sample_ring(None)
+        acquisition.close()
+        acquisition = None
+        sensor.sensor_thread_running = False
     filename = f"{time.strftime('%Y-%m-%d')}.csv"
     return jsonify({"message": "Sensor reading loop stopped.", "filename": filename}), 200
 
 @app.route('/sensor/status', methods=['GET'])
 def sensor_status():
     cal_status = calibrate_status()
-    return jsonify({"running": sensor.sensor_thread_running,
-                    "last_calibration":calibration_ratio}), 200
+    running = acquisition.is_alive() if acquisition is not None else sensor.sensor_thread_running
+    return jsonify({"running": running,
+                    "last_calibration":calibration_ratio,
+                    "sample_rate_hz": sensor.sample_rate_hz,
+                    "scheduler": sensor.get_scheduler_stats()}), 200
 
 @app.route('/sensor/value', methods=['GET'])
 def sensor_value():
@@ -240,6 +427,64 @@ def sensor_value():
         return jsonify({"message": "No sensor value available."}), 204
     return jsonify({"value": value}), 200
 
+@app.route('/sensor/stream', methods=['GET'])
+def sensor_stream():
+    """
+    Server-Sent Events with every new sample ("sample" events carrying
+    timestamp, value and raw). A client that falls behind loses its oldest
+    samples and is told how many in "dropped"; ?coalesce=1 only keeps the
+    newest sample between wakeups, for displays.
+    """
+    coalesce = request.args.get("coalesce") not in (None, "", "0", "false")
+    subscription = sensor.sample_broadcaster.subscribe(maxlen=1 if coalesce else None)
+    return Response(sse_stream(sensor.sample_broadcaster, subscription), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/events', methods=['GET'])
+def weight_events():
+    """
+    Logged weight events (see events.py), oldest first. Optional start and
+    end (ISO-8601) bound the event start times; kind=step,transient keeps
+    only those kinds.
+    """
+    try:
+        query = parse_query(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    kinds = request.args.get("kind")
+    if kinds:
+        kinds = kinds.split(",")
+        if not set(kinds) <= set(EVENT_KINDS):
+            return jsonify({"message": f"kind must be among {', '.join(EVENT_KINDS)}."}), 400
+    events = read_events(sensor.EVENT_DIR, query["start"], query["end"], kinds or None)
+    return jsonify({"events": [event_json(event) for event in events], "count": len(events)}), 200
+
+@app.route('/events/stream', methods=['GET'])
+def weight_event_stream():
+    """Server-Sent Events ("weight_event") for each new event, as it is detected."""
+    subscription = sensor.event_broadcaster.subscribe()
+    return Response(sse_stream(sensor.event_broadcaster, subscription, render=sse_event),
+                    mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def create_video_streamer():
+    camera = None
+    if app.config["VIDEO_BACKEND"] == "fake":
+        from fake_camera import FakeCamera
+        print("[DEBUG] Using fake camera backend.")
+        camera = FakeCamera()
+    elif app.config["VIDEO_BACKEND"] != "picamera2":
+        raise ValueError(f"Unknown video backend: {app.config['VIDEO_BACKEND']}")
+    recording = {
+        "codec": app.config["VIDEO_CODEC"],
+        "segment_seconds": app.config["VIDEO_SEGMENT_SECONDS"],
+        "segment_bytes": int(app.config["VIDEO_SEGMENT_MB"] * 1024 * 1024) or None,
+        "retention_bytes": int(app.config["VIDEO_RETENTION_MB"] * 1024 * 1024) or None,
+    }
+    return VideoStreamer(camera=camera, encoder=app.config["VIDEO_ENCODER"],
+                         fps=app.config["VIDEO_FPS"], idle_fps=app.config["VIDEO_IDLE_FPS"],
+                         recording=recording)
+
 @app.route('/video/start', methods=['POST'])
 def start_video():
     global video_streamer, video_mode, video_filename
@@ -251,11 +496,11 @@ def start_video():
         if video_streamer is not None:
             return jsonify({"message": f"Video already running in {video_mode} mode."}), 400
         try:
-            video_streamer = VideoStreamer()
+            video_streamer = create_video_streamer()
             if mode == 'record':
                 video_streamer.start_recording(filename)
                 video_mode = 'record'
-                video_filename = filename
+                video_filename = os.path.splitext(os.path.basename(filename))[0]
             elif mode == 'livestream':
                 video_mode = 'livestream'
                 video_filename = None
@@ -263,9 +508,14 @@ def start_video():
                 video_streamer.release()
                 video_streamer = None
                 return jsonify({"message": "Invalid mode."}), 400
-            return jsonify({"message": f"{mode.capitalize()} started.", "mode": video_mode, "filename": video_filename}), 200
+            return jsonify({"message": f"{mode.capitalize()} started.", "mode": video_mode,
+                            "prefix": video_filename, "filename": recording_name(video_streamer)}), 200
         except CameraBusyException:
             return jsonify({"message": "Camera is currently in use by another user."}), 503
+        except ValueError as e:
+            # VIDEO_FPS / VIDEO_IDLE_FPS out of range, or an unknown backend or encoder
+            video_streamer = None
+            return jsonify({"message": f"Video configuration error: {e}"}), 500
 
 @app.route('/video/stop', methods=['POST'])
 def stop_video():
@@ -273,6 +523,7 @@ def stop_video():
     with video_lock:
         if video_streamer is None:
             return jsonify({"message": "No video in progress."}), 400
+        recorder = video_streamer.recorder
         try:
             if video_mode == 'record':
                 print("[DEBUG] Stopping video recording...")
@@ -285,39 +536,96 @@ def stop_video():
             return jsonify({"message": f"Error stopping video: {e}"}), 500
         video_streamer = None
         stopped_mode = video_mode
-        stopped_filename = video_filename
+        stopped_prefix = video_filename
         video_mode = None
         video_filename = None
-    return jsonify({"message": f"{stopped_mode.capitalize()} stopped.", "mode": stopped_mode, "filename": stopped_filename}), 200
+    segments = [os.path.basename(path) for path in recorder.segments] if recorder is not None else []
+    return jsonify({"message": f"{stopped_mode.capitalize()} stopped.", "mode": stopped_mode,
+                    "prefix": stopped_prefix, "filename": segments[-1] if segments else None,
+                    "segments": segments}), 200
+
+def recording_name(streamer):
+    """File name of the segment streamer is recording to, or None."""
+    path = streamer.recording_path if streamer is not None else None
+    return os.path.basename(path) if path else None
+
 @app.route('/video/status', methods=['GET'])
 def video_status():
-    running = video_streamer is not None
+    streamer = video_streamer
+    running = streamer is not None
     return jsonify({
         "running": running,
         "mode": video_mode,
-        "filename": video_filename
+        "prefix": video_filename,
+        "filename": recording_name(streamer),
+        "capture": streamer.capture_stats() if running else None
     }), 200
 
+@app.route('/video/frames', methods=['GET'])
+def video_frames():
+    """
+    Recorded frames captured between start and end (ISO-8601), e.g. the
+    window around a weight change: segment file, frame number within it
+    and capture time of each.
+    """
+    try:
+        query = parse_query(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    if query["start"] is None or query["end"] is None:
+        return jsonify({"message": "start and end are required."}), 400
+    frames = [{"segment": os.path.basename(segment), "frame": frame, "timestamp": from_ns(wall_ns).isoformat()}
+              for segment, frame, wall_ns in frames_between(VIDEO_DIR, query["start"], query["end"])]
+    return jsonify({"frames": frames, "count": len(frames)}), 200
+
+@app.route('/video/frame-sample', methods=['GET'])
+def video_frame_sample():
+    """The weight sample nearest to frame `frame` of recorded segment `segment`."""
+    segment = os.path.basename(request.args.get('segment', ''))
+    path = os.path.join(VIDEO_DIR, segment)
+    if not segment or not os.path.exists(frame_index_path(path)):
+        return jsonify({"message": "Segment not found."}), 404
+    try:
+        frame = int(request.args.get('frame', ''))
+        wall_ns = frame_time(path, frame)
+    except ValueError:
+        return jsonify({"message": "frame must be an integer."}), 400
+    except IndexError as e:
+        return jsonify({"message": str(e)}), 404
+    response = {"segment": segment, "frame": frame, "timestamp": from_ns(wall_ns).isoformat(), "sample": None}
+    sample = nearest_sample(DATA_DIR, sensor.SERIES_DIR, wall_ns)
+    if sample is not None:
+        sample_ns, value = sample
+        response["sample"] = {"timestamp": from_ns(sample_ns).isoformat(), "value": value,
+                              "offset_ms": (sample_ns - wall_ns) / 1e6}
+    return jsonify(response), 200
+
 @app.route('/video_feed')
 def video_feed():
-    global video_streamer
+    streamer = video_streamer
+    if streamer is None:
+        return Response(b'--frame\r\nContent-Type: text/plain\r\n\r\n'
+                        b"No stream running.\r\n", mimetype='multipart/x-mixed-replace; boundary=frame')
+    # each frame is encoded once by VideoStreamer and shared by all viewers;
+    # capture runs at full rate only while there is one
+    try:
+        streamer.add_viewer()
+    except Exception as e:
+        print(f"[ERROR] video_feed: could not start the camera encoder: {e}")
+        return jsonify({"message": f"Could not start the video encoder: {e}"}), 503
+
     def generate():
-        streamer = video_streamer
-        if streamer is None:
-            yield (b'--frame\r\nContent-Type: text/plain\r\n\r\n'
-                   b"No stream running.\r\n")
-            return
-        try:
-            while True:
-                frame = streamer.get_jpeg()
-                if frame:
-                    yield (b'--frame\r\n'
-                        b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-                else:
-                    time.sleep(0.1)
-        except Exception:
-            pass
-    return Response(generate(), mimetype='multipart/x-mixed-replace; boundary=frame')
+        seq = 0
+        while streamer.running:
+            seq, frame = streamer.wait_jpeg(seq)
+            if frame:
+                yield (b'--frame\r\n'
+                    b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+
+    response = Response(generate(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    # runs when the client goes away, even if the body was never iterated
+    response.call_on_close(streamer.remove_viewer)
+    return response
 
 if __name__ == "__main__":
     with app.app_context():
@@ -0,0 +1,189 @@
+"""
+Time-range reads over the daily recordings (data/<date>.csv) without
+scanning whole files.
+
+Each CSV gets a sparse index of (timestamp, byte offset) pairs, one every
+INDEX_STRIDE rows, built on first use and extended as the file grows. A
+range read bisects the index for the first and last blocks that can hold
+[start, end] and parses only those bytes. Files whose timestamps go
+backwards somewhere (hand-edited or merged CSVs) are read whole and
+filtered instead. Days that only exist in the binary store (data/series)
+are read from its memory-mapped chunks.
+"""
+import os
+import re
+import threading
+import numpy as np
+from series import (Series, read_csv_rows, parse_timestamp, parse_timestamps, parse_values, format_timestamps,
+                    read_tail, appended)
+from dashboard import select_window, window_indices
+from timeseries_store import SeriesReader, from_ns
+
+INDEX_STRIDE = 1024
+BLOCK_SIZE = 1 << 22
+DAY_FILE = re.compile(r"^(\d{4}-\d{2}-\d{2})\.csv$")
+
+def _label_ns(labels):
+    try:
+        return parse_timestamps(labels)
+    except ValueError:
+        # a malformed row somewhere in the block; drop just that one
+        stamps = []
+        for label in labels:
+            try:
+                stamps.append(parse_timestamp(label))
+            except ValueError:
+                stamps.append(None)
+        return stamps
+
+class CsvIndex:
+    """Sparse timestamp -> byte offset index of one recording CSV."""
+
+    def __init__(self, path, stride=INDEX_STRIDE):
+        self.path = path
+        self.stride = stride
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.mtime_ns = None
+        self.size = None
+        self.columns = None
+        self.end = 0
+        self.rows = 0
+        self.monotonic = True
+        self.first_ns = None
+        self.last_ns = None
+        self._tail = b""
+        self._ns = []
+        self._offsets = []
+
+    def refresh(self):
+        stat = os.stat(self.path)
+        with self._lock:
+            if stat.st_mtime_ns == self.mtime_ns and stat.st_size == self.size:
+                return self
+            if self.columns is None or not appended(self.path, stat.st_size, self.end, self._tail):
+                self._reset()
+            self._scan()
+            self.mtime_ns, self.size = stat.st_mtime_ns, stat.st_size
+        return self
+
+    def _scan(self):
+        with open(self.path, "rb") as f:
+            f.seek(self.end)
+            if self.columns is None:
+                header = f.readline()
+                if not header.endswith(b"\n"):
+                    return  # header not written yet
+                names = header.decode().strip().split(",")
+                self.columns = (names.index("Timestamp"), names.index("Value"))
+                self.end = f.tell()
+            ts_col = self.columns[0]
+            while True:
+                block = f.read(BLOCK_SIZE)
+                cut = block.rfind(b"\n") + 1
+                if not cut:
+                    break
+                lines = block[:cut].split(b"\n")[:-1]
+                lengths = np.fromiter((len(line) + 1 for line in lines), dtype=np.int64, count=len(lines))
+                offsets = self.end + np.concatenate(([0], np.cumsum(lengths)[:-1]))
+                labels = [line.split(b",")[ts_col].decode() if line.count(b",") >= max(self.columns) else None
+                          for line in lines]
+                self._add_rows([l for l in labels if l is not None],
+                               offsets[[l is not None for l in labels]])
+                self.end += cut
+                f.seek(self.end)
+        self._tail = read_tail(self.path, self.end)
+
+    def _add_rows(self, labels, offsets):
+        stamps = _label_ns(labels)
+        if not isinstance(stamps, np.ndarray):
+            keep = [s is not None for s in stamps]
+            stamps = np.array([s for s in stamps if s is not None], dtype=np.int64)
+            offsets = offsets[keep]
+        if not len(stamps):
+            return
+        if self.last_ns is not None and stamps[0] < self.last_ns or np.any(np.diff(stamps) < 0):
+            self.monotonic = False
+        if self.first_ns is None:
+            self.first_ns = int(stamps[0])
+        self.last_ns = int(stamps[-1])
+        # rows at positions rows, rows + stride, ... of the whole file
+        first = (-self.rows) % self.stride
+        self._ns.extend(stamps[first::self.stride].tolist())
+        self._offsets.extend(offsets[first::self.stride].tolist())
+        self.rows += len(stamps)
+
+    def locate(self, start=None, end=None):
+        """Byte range [lo, hi) that holds every row in [start, end]; hi is None for end of file."""
+        with self._lock:
+            ns, offsets = self._ns, self._offsets
+            lo = offsets[0] if offsets else self.end
+            hi = None
+            if start is not None and ns:
+                i = int(np.searchsorted(ns, start, side="left")) - 1
+                lo = offsets[max(i, 0)]
+            if end is not None and ns:
+                j = int(np.searchsorted(ns, end, side="right"))
+                hi = offsets[j] if j < len(offsets) else None
+        return lo, hi
+
+    def read(self, start=None, end=None):
+        """Series of the rows with start <= timestamp <= end."""
+        if not self.monotonic or self.columns is None:
+            labels, values, _, _, _ = read_csv_rows(self.path)
+            timestamps = parse_timestamps(labels)
+            picked = window_indices(timestamps, start, end)
+            return Series(timestamps[picked], parse_values(values)[picked], [labels[i] for i in picked.tolist()])
+        lo, hi = self.locate(start, end)
+        labels, values, _, _, _ = read_csv_rows(self.path, lo, self.columns, stop=hi)
+        series = Series(parse_timestamps(labels), parse_values(values), labels)
+        a, b = select_window(series.timestamps, start, end)
+        return Series(series.timestamps[a:b], series.values[a:b], series.labels[a:b])
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def csv_index(path):
+    """The up-to-date index of path, shared between requests."""
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = CsvIndex(path)
+    return index.refresh()
+
+def days_in_range(data_dir, series_dir=None, start=None, end=None):
+    """Sorted recording days (YYYY-MM-DD) with a CSV or binary store directory overlapping [start, end]."""
+    days = set()
+    if os.path.isdir(data_dir):
+        days.update(m.group(1) for m in map(DAY_FILE.match, os.listdir(data_dir)) if m)
+    if series_dir and os.path.isdir(series_dir):
+        days.update(name for name in os.listdir(series_dir) if DAY_FILE.match(name + ".csv"))
+    first = str(from_ns(start).date()) if start is not None else None
+    last = str(from_ns(end).date()) if end is not None else None
+    return sorted(day for day in days
+                  if (first is None or day >= first) and (last is None or day <= last))
+
+def read_day(data_dir, series_dir, day, start=None, end=None):
+    path = os.path.join(data_dir, f"{day}.csv")
+    if os.path.exists(path):
+        return csv_index(path).read(start, end)
+    # no CSV for this day (deleted or exported elsewhere): use the binary store
+    timestamps, weights, _ = SeriesReader(os.path.join(series_dir, day)).arrays()
+    lo, hi = select_window(timestamps, start, end)
+    timestamps = np.asarray(timestamps[lo:hi])
+    return Series(timestamps, np.asarray(weights[lo:hi], dtype=np.float64), format_timestamps(timestamps))
+
+def read_range(data_dir, series_dir=None, start=None, end=None):
+    """One Series with every sample in [start, end] across the daily files, day by day."""
+    parts = [read_day(data_dir, series_dir, day, start, end)
+             for day in days_in_range(data_dir, series_dir, start, end)]
+    parts = [part for part in parts if len(part.labels)]
+    if not parts:
+        return Series(np.zeros(0, dtype=np.int64), np.zeros(0), [])
+    if len(parts) == 1:
+        return parts[0]
+    return Series(np.concatenate([p.timestamps for p in parts]),
+                  np.concatenate([p.values for p in parts]),
+                  [label for p in parts for label in p.labels])
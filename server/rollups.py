@@ -0,0 +1,259 @@
+"""
+Multi-resolution rollups (1 s, 1 min, 15 min, 1 h) of recorded weight.
+
+Each recording (the CSV stem, i.e. the date) gets data/rollups/<stem>/
+with one file per tier of ROLLUP_DTYPE records: bucket start, min, max,
+sum and count. Files are append-only logs of bucket states; a bucket can
+be written more than once (periodic snapshots of the open bucket, or a
+restart within a bucket) and the last record for a bucket wins. close()
+compacts them.
+
+RollupWriter is fed sample by sample from read_sensor_loop and backfills a
+day from its CSV the first time it sees a day without rollups. Existing
+CSVs are backfilled in bulk with:
+
+    python rollups.py backfill [data/2025-06-11.csv ...]
+"""
+import os
+import sys
+import time
+import numpy as np
+from timeseries_store import to_ns
+
+TIERS = (1, 60, 900, 3600)  # bucket widths in seconds
+ROLLUP_DTYPE = np.dtype([("bucket_ns", "<i8"), ("min", "<f8"), ("max", "<f8"),
+                         ("sum", "<f8"), ("count", "<i8")])
+ROLLUP_DIR = os.path.join(os.path.dirname(__file__), 'data', 'rollups')
+
+NS = 1_000_000_000
+
+def tier_path(root_dir, stem, width):
+    return os.path.join(root_dir, stem, f"{width}s.bin")
+
+def _last_record(path):
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    count = size // ROLLUP_DTYPE.itemsize
+    if not count:
+        return None
+    return np.fromfile(path, dtype=ROLLUP_DTYPE, count=1, offset=(count - 1) * ROLLUP_DTYPE.itemsize)[0]
+
+class _TierAccumulator:
+    def __init__(self, width):
+        self.width_ns = width * NS
+        self.bucket = None
+        self.pending = []
+
+    def resume(self, record):
+        self.bucket = int(record["bucket_ns"])
+        self.min = float(record["min"])
+        self.max = float(record["max"])
+        self.sum = float(record["sum"])
+        self.count = int(record["count"])
+
+    def add(self, timestamp_ns, value):
+        bucket = timestamp_ns - timestamp_ns % self.width_ns
+        if bucket != self.bucket:
+            if self.bucket is not None:
+                self.pending.append(self.state())
+            self.bucket = bucket
+            self.min = self.max = self.sum = value
+            self.count = 1
+            return
+        if value < self.min:
+            self.min = value
+        elif value > self.max:
+            self.max = value
+        self.sum += value
+        self.count += 1
+
+    def state(self):
+        return (self.bucket, self.min, self.max, self.sum, self.count)
+
+class RollupWriter:
+    """
+    Updates every tier in O(1) per sample. Closed buckets are written every
+    flush_interval seconds; the still-open bucket of each tier is
+    snapshotted every snapshot_interval seconds so coarse tiers stay current
+    for the dashboard while a recording runs.
+    """
+
+    def __init__(self, root_dir=ROLLUP_DIR, csv_dir=None, tiers=TIERS, flush_interval=5.0,
+                 snapshot_interval=30.0, clock=time.monotonic):
+        self.root_dir = root_dir
+        self.csv_dir = csv_dir
+        self.tiers = tiers
+        self.flush_interval = flush_interval
+        self.snapshot_interval = snapshot_interval
+        self._clock = clock
+        self._stem = None
+        self._accumulators = []
+        self._last_flush = self._last_snapshot = clock()
+
+    def write(self, timestamp, value):
+        stem = str(timestamp.date())
+        if stem != self._stem:
+            self._open(stem)
+        if value is False or value is None or value != value:
+            return
+        timestamp_ns = to_ns(timestamp)
+        for accumulator in self._accumulators:
+            accumulator.add(timestamp_ns, value)
+        now = self._clock()
+        if now - self._last_snapshot >= self.snapshot_interval:
+            self.flush(snapshot=True)
+        elif now - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _open(self, stem):
+        self.close()
+        self._stem = stem
+        csv_path = os.path.join(self.csv_dir, f"{stem}.csv") if self.csv_dir else None
+        if csv_path and not has_rollups(self.root_dir, stem) and os.path.exists(csv_path):
+            # rows recorded before rollups existed
+            backfill(csv_path, self.root_dir, self.tiers)
+        os.makedirs(os.path.join(self.root_dir, stem), exist_ok=True)
+        self._accumulators = []
+        for width in self.tiers:
+            accumulator = _TierAccumulator(width)
+            # continue the bucket a previous run left open
+            last = _last_record(tier_path(self.root_dir, stem, width))
+            if last is not None:
+                accumulator.resume(last)
+            self._accumulators.append(accumulator)
+
+    def flush(self, snapshot=False):
+        for width, accumulator in zip(self.tiers, self._accumulators):
+            records = accumulator.pending
+            if snapshot and accumulator.bucket is not None:
+                records = records + [accumulator.state()]
+            if records:
+                with open(tier_path(self.root_dir, self._stem, width), "ab") as f:
+                    f.write(np.array(records, dtype=ROLLUP_DTYPE).tobytes())
+            accumulator.pending = []
+        self._last_flush = self._clock()
+        if snapshot:
+            self._last_snapshot = self._last_flush
+
+    def close(self):
+        if self._stem is None:
+            return
+        self.flush(snapshot=True)
+        for width in self.tiers:
+            path = tier_path(self.root_dir, self._stem, width)
+            _write_tier(path, load_tier_file(path))
+        self._stem = None
+        self._accumulators = []
+
+def _write_tier(path, records):
+    tmp = path + ".tmp"
+    records.tofile(tmp)
+    os.replace(tmp, path)
+
+def load_tier_file(path):
+    """Tier records with superseded snapshots dropped (last record per bucket wins)."""
+    if not os.path.exists(path):
+        return np.zeros(0, dtype=ROLLUP_DTYPE)
+    records = np.fromfile(path, dtype=ROLLUP_DTYPE)
+    if len(records) < 2:
+        return records
+    keep = np.append(records["bucket_ns"][1:] != records["bucket_ns"][:-1], True)
+    return records[keep]
+
+def has_rollups(root_dir, stem):
+    return os.path.exists(tier_path(root_dir, stem, TIERS[0]))
+
+def extent(root_dir, stems):
+    """(first_ns, last_ns) covered by the rollups of the given stems, or None."""
+    first = last = None
+    for stem in stems:
+        path = tier_path(root_dir, stem, TIERS[0])
+        if not os.path.exists(path) or os.path.getsize(path) < ROLLUP_DTYPE.itemsize:
+            continue
+        head = np.fromfile(path, dtype=ROLLUP_DTYPE, count=1)[0]
+        tail = _last_record(path)
+        start, end = int(head["bucket_ns"]), int(tail["bucket_ns"]) + TIERS[0] * NS
+        first = start if first is None else min(first, start)
+        last = end if last is None else max(last, end)
+    return None if first is None else (first, last)
+
+def choose_tier(span_ns, points, tiers=TIERS):
+    """Coarsest tier that still gives at least `points` buckets over span_ns, or None if raw is needed."""
+    resolution = span_ns / max(points, 1)
+    chosen = None
+    for width in tiers:
+        if width * NS <= resolution:
+            chosen = width
+    return chosen
+
+def query(root_dir, stems, points, start=None, end=None):
+    """
+    Rollup buckets of the coarsest sufficient tier for [start, end], merged
+    down to at most `points` groups. Returns (records, width) or None when
+    there are no rollups or the window needs finer than 1 s resolution.
+    """
+    if not stems or not all(has_rollups(root_dir, stem) for stem in stems):
+        return None  # a partial answer would silently drop days
+    bounds = extent(root_dir, stems)
+    if bounds is None:
+        return None
+    start = bounds[0] if start is None else start
+    end = bounds[1] if end is None else end
+    if end <= start:
+        return None
+    width = choose_tier(end - start, points)
+    if width is None:
+        return None
+    parts = [load_tier_file(tier_path(root_dir, stem, width)) for stem in stems]
+    records = np.concatenate(parts) if parts else np.zeros(0, dtype=ROLLUP_DTYPE)
+    buckets = records["bucket_ns"]
+    records = records[(buckets + width * NS > start) & (buckets <= end)]
+    return merge(records, points), width
+
+def merge(records, points):
+    """Combine adjacent buckets into at most `points` groups."""
+    if len(records) <= points:
+        return records
+    starts = np.linspace(0, len(records), points + 1).astype(np.int64)[:-1]
+    merged = np.zeros(len(starts), dtype=ROLLUP_DTYPE)
+    merged["bucket_ns"] = records["bucket_ns"][starts]
+    merged["min"] = np.minimum.reduceat(records["min"], starts)
+    merged["max"] = np.maximum.reduceat(records["max"], starts)
+    merged["sum"] = np.add.reduceat(records["sum"], starts)
+    merged["count"] = np.add.reduceat(records["count"], starts)
+    return merged
+
+def backfill(csv_path, root_dir=ROLLUP_DIR, tiers=TIERS):
+    """Rebuild every tier for one CSV from its raw rows. Returns the number of samples used."""
+    from series import load_csv
+    timestamps, values, _ = load_csv(csv_path)
+    valid = ~np.isnan(values)
+    timestamps, values = timestamps[valid], values[valid]
+    if len(timestamps) > 1 and np.any(np.diff(timestamps) < 0):
+        order = np.argsort(timestamps, kind="stable")
+        timestamps, values = timestamps[order], values[order]
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    os.makedirs(os.path.join(root_dir, stem), exist_ok=True)
+    for width in tiers:
+        buckets = timestamps - timestamps % (width * NS)
+        starts = np.flatnonzero(np.append(True, buckets[1:] != buckets[:-1])) if len(buckets) else buckets
+        records = np.zeros(len(starts), dtype=ROLLUP_DTYPE)
+        if len(starts):
+            records["bucket_ns"] = buckets[starts]
+            records["min"] = np.minimum.reduceat(values, starts)
+            records["max"] = np.maximum.reduceat(values, starts)
+            records["sum"] = np.add.reduceat(values, starts)
+            records["count"] = np.diff(np.append(starts, len(values)))
+        _write_tier(tier_path(root_dir, stem, width), records)
+    return len(timestamps)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "backfill":
+        print(__doc__)
+        sys.exit(1)
+    data_dir = os.path.join(os.path.dirname(__file__), 'data')
+    paths = sys.argv[2:] or sorted(os.path.join(data_dir, f) for f in os.listdir(data_dir)
+                                   if f.endswith('.csv'))
+    for path in paths:
+        start = time.monotonic()
+        count = backfill(path)
+        print(f"{path}: {count} samples in {time.monotonic() - start:.2f}s")
@@ -0,0 +1,103 @@
+import math
+import time
+
+MIN_RATE_HZ = 0.1
+MAX_RATE_HZ = 80.0  # HX711 output rate with RATE pulled high
+
+POLICIES = ("skip", "catchup")
+
+class RateScheduler:
+    """
+    Fixed-rate tick scheduler on a monotonic clock.
+
+    Deadlines sit on a fixed grid (start + n * period), so the sample rate
+    doesn't drift with the time spent reading or writing. When a tick is
+    late by more than a whole period:
+
+    - "skip" drops the missed ticks and resumes on the next grid point;
+    - "catchup" runs the missed ticks back to back until it is on time.
+
+    missed_deadlines in stats() counts dropped slots for "skip" and ticks
+    that ran a full period late for "catchup".
+    """
+
+    def __init__(self, rate_hz, policy="skip", max_sleep=0.25, clock=time.monotonic, sleep=time.sleep,
+                 min_rate=MIN_RATE_HZ, max_rate=MAX_RATE_HZ):
+        """min_rate/max_rate default to the HX711's range; other users pass their own."""
+        rate_hz = float(rate_hz)
+        if not min_rate <= rate_hz <= max_rate:
+            raise ValueError(f"Rate must be between {min_rate} and {max_rate} Hz")
+        if policy not in POLICIES:
+            raise ValueError(f"Policy must be one of {', '.join(POLICIES)}")
+        self.rate_hz = rate_hz
+        self.period = 1.0 / rate_hz
+        self.policy = policy
+        self.max_sleep = max_sleep
+        self._clock = clock
+        self._sleep = sleep
+        self.start()
+
+    def start(self):
+        now = self._clock()
+        self._start = now
+        self._next = now
+        self._ticks = 0
+        self._missed = 0
+        self._last_tick = None
+        # Welford running mean/variance of tick lateness
+        self._late_mean = 0.0
+        self._late_m2 = 0.0
+        self._late_max = 0.0
+
+    def wait(self, should_continue=None):
+        """
+        Sleep until the next deadline. Returns False if should_continue()
+        turned false while waiting; long waits are sliced into max_sleep
+        chunks so a stop request is noticed promptly even at 0.1 Hz.
+        """
+        deadline = self._next
+        while True:
+            remaining = deadline - self._clock()
+            if remaining <= 0:
+                break
+            if should_continue is not None and not should_continue():
+                return False
+            self._sleep(min(remaining, self.max_sleep))
+        if should_continue is not None and not should_continue():
+            return False
+
+        now = self._clock()
+        self._record(now - deadline)
+        self._last_tick = now
+        self._next = deadline + self.period
+        if now >= self._next:
+            if self.policy == "skip":
+                behind = int((now - self._next) // self.period) + 1
+                self._missed += behind
+                self._next += behind * self.period
+            else:
+                # this tick overran its slot; the next one runs immediately
+                self._missed += 1
+        return True
+
+    def _record(self, lateness):
+        self._ticks += 1
+        delta = lateness - self._late_mean
+        self._late_mean += delta / self._ticks
+        self._late_m2 += delta * (lateness - self._late_mean)
+        self._late_max = max(self._late_max, lateness)
+
+    def stats(self):
+        elapsed = (self._last_tick - self._start) if self._last_tick is not None else 0.0
+        jitter = math.sqrt(self._late_m2 / (self._ticks - 1)) if self._ticks > 1 else 0.0
+        return {
+            "target_rate_hz": self.rate_hz,
+            # ticks after the first, over the time they took
+            "achieved_rate_hz": (self._ticks - 1) / elapsed if elapsed > 0 else 0.0,
+            "jitter_ms": jitter * 1000.0,
+            "mean_lateness_ms": self._late_mean * 1000.0,
+            "max_lateness_ms": self._late_max * 1000.0,
+            "missed_deadlines": self._missed,
+            "ticks": self._ticks,
+            "policy": self.policy,
+        }
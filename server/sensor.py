@@ -3,9 +3,18 @@ import time
 import datetime
 import os
 import threading
+from scheduler import RateScheduler
+from csv_writer import BufferedCsvWriter
+from timeseries_store import BinarySeriesWriter, to_ns
+from rollups import RollupWriter
+from broadcast import SampleBroadcaster
+from events import StepDetector, EventLog
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 CALIBRATION_FILE = os.path.join(DATA_DIR, "calibration_ratio.txt")
+SERIES_DIR = os.path.join(DATA_DIR, "series")
+ROLLUP_DIR = os.path.join(DATA_DIR, "rollups")
+EVENT_DIR = os.path.join(DATA_DIR, "events")
 
 # This is a debugging version of sensor.py, with extra print statements to help diagnose calibration/reporting issues.
 DOUT_PIN = 21
@@ -15,6 +24,36 @@ hx = None
 
 sensor_thread_event = threading.Event()
 sensor_thread_running = False  # <-- For status reporting
+latest_sensor_value = None
+# acquisition.SampleRing shared with the web process when acquisition runs in its own process
+sample_ring = None
+
+# live samples for /sensor/stream subscribers (see broadcast.py)
+sample_broadcaster = SampleBroadcaster()
+
+# step/settle detection on every sample (see events.py); events are logged
+# to EVENT_DIR and pushed to /events/stream subscribers
+events_enabled = True
+event_detector_options = {"window": 8, "tolerance": 5.0, "step": 20.0}
+event_detector = None
+event_log = EventLog(EVENT_DIR)
+event_broadcaster = SampleBroadcaster(maxlen=64)
+
+# read_sensor_loop timing, see scheduler.RateScheduler
+sample_rate_hz = 2.0
+schedule_policy = "skip"
+sensor_scheduler = None
+
+# stream_filters.FilterChain applied to single conversions in read_sample;
+# None averages a batch of reads per sample instead
+stream_filter = None
+
+# BufferedCsvWriter settings for read_sensor_loop
+csv_writer_options = {"flush_rows": 50, "flush_interval": 5.0, "fsync": False}
+# also append every sample to the binary store in SERIES_DIR (see timeseries_store.py)
+binary_store_enabled = True
+# keep the 1 s / 1 min / 15 min / 1 h rollups in ROLLUP_DIR current (see rollups.py)
+rollups_enabled = True
 
 calibration_state = {
     "in_progress": False,
@@ -141,16 +180,27 @@ def calibrate_status():
     # Return all debug info as well for diagnosis
     return calibration_state.copy()
 
+def read_sample(readings=5):
+    if stream_filter is not None:
+        # one conversion per sample, smoothed across samples
+        reading = hx.get_filtered_reading(stream_filter)
+        if reading is False:
+            print("[DEBUG] read_sample: invalid conversion")
+            return False
+    else:
+        # One batch of ADC reads gives raw, offset-corrected value and weight together
+        reading = hx.get_reading(readings=readings)
+        if reading is False:
+            print("[DEBUG] read_sample: no valid conversion in batch")
+            return False
+    print(f"[DEBUG] read_sample: raw={reading.raw}, offset={reading.offset}, scale={reading.scale}, weight={reading.weight}")
+    return reading
+
 def read_mass():
-    weight = hx.get_weight_mean(readings=5)
-    try:
-        raw = hx.get_raw_data_mean(readings=5)
-        offset = getattr(hx, 'offset', None)
-        scale = getattr(hx, 'scale', None)
-        print(f"[DEBUG] read_mass: raw={raw}, offset={offset}, scale={scale}, weight={weight}")
-    except Exception as e:
-        print(f"[DEBUG] Exception in read_mass: {e}")
-    return weight
+    reading = read_sample()
+    if reading is False:
+        return False
+    return reading.weight
 
 def write_mass_to_csv(mass, timestamp, filename):
     write_header = not os.path.exists(filename)
@@ -164,25 +214,105 @@ def read_sensor_loop():
     global sensor_thread_running
     print("[DEBUG] read_sensor_loop: Thread started.")
     sensor_thread_running = True  # <-- Set when thread starts
+    global sensor_scheduler
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
+    sensor_scheduler = RateScheduler(sample_rate_hz, schedule_policy)
+    csv_writer = BufferedCsvWriter(DATA_DIR, **csv_writer_options)
+    series_writer = None
+    if binary_store_enabled:
+        series_writer = BinarySeriesWriter(SERIES_DIR, flush_records=csv_writer_options["flush_rows"],
+                                           flush_interval=csv_writer_options["flush_interval"],
+                                           fsync=csv_writer_options["fsync"])
+    rollup_writer = None
+    if rollups_enabled:
+        rollup_writer = RollupWriter(ROLLUP_DIR, csv_dir=DATA_DIR,
+                                     flush_interval=csv_writer_options["flush_interval"])
+    if stream_filter is not None:
+        # don't carry the level over from the last run
+        stream_filter.reset()
+    if sample_ring is None:
+        # with an acquisition process the web process detects events off the ring (see main.py)
+        start_event_detection()
     try:
-        while sensor_thread_event.is_set():
+        while sensor_scheduler.wait(sensor_thread_event.is_set):
             print("[DEBUG] read_sensor_loop: Loop is active.")
-            value = read_mass()
-            set_sensor_value(value)
-            timestamp = datetime.datetime.now().isoformat()
-            filename = os.path.join(DATA_DIR, f"{datetime.date.today()}.csv")
-            write_mass_to_csv(value, timestamp, filename)
-            time.sleep(0.5)
+            reading = read_sample()
+            value = reading.weight if reading is not False else False
+            now = datetime.datetime.now()
+            set_sensor_value(value, raw=reading.raw if reading is not False else None, timestamp=now)
+            if rollup_writer is not None:
+                # before the CSV write, so a first-of-day backfill only sees earlier rows
+                rollup_writer.write(now, value)
+            csv_writer.write(now, value)
+            if event_detector is not None and sample_ring is None:
+                detect_events(to_ns(now), value)
+            if series_writer is not None:
+                series_writer.write(now, value, reading.raw if reading is not False else None)
+            if sample_ring is not None:
+                sample_ring.publish_stats(sensor_scheduler.stats())
     finally:
+        csv_writer.close()
+        if series_writer is not None:
+            series_writer.close()
+        if rollup_writer is not None:
+            rollup_writer.close()
+        sensor_scheduler = None
         print("[DEBUG] read_sensor_loop: Thread exiting.")
         sensor_thread_running = False  # <-- Clear when thread exits
 
-def set_sensor_value(val):
+def start_event_detection():
+    global event_detector
+    event_detector = StepDetector(**event_detector_options) if events_enabled else None
+
+def detect_events(timestamp_ns, value):
+    event = event_detector.update(timestamp_ns, value)
+    if event is None:
+        return
+    print(f"[DEBUG] weight event: {event}")
+    try:
+        event_log.write(event)
+    except OSError as e:
+        print(f"[DEBUG] Failed to log weight event: {e}")
+    event_broadcaster.publish(event)
+
+def attach_sample_ring(ring):
+    global sample_ring
+    sample_ring = ring
+
+def set_sensor_value(val, raw=None, timestamp=None):
     global latest_sensor_value
     latest_sensor_value = val
+    if val is False:
+        return
+    if timestamp is None:
+        timestamp = datetime.datetime.now()
+    if sample_ring is not None:
+        # the web process's RingBridge broadcasts it from there
+        sample_ring.push(to_ns(timestamp), raw if raw is not None else 0, val)
+    else:
+        sample_broadcaster.publish(to_ns(timestamp), raw if raw is not None else 0, val)
+
+def set_sample_rate(rate_hz, policy=None):
+    """Validate and store the rate/policy used by the next read_sensor_loop run."""
+    global sample_rate_hz, schedule_policy
+    policy = policy or schedule_policy
+    RateScheduler(rate_hz, policy)  # raises ValueError if out of range
+    sample_rate_hz = float(rate_hz)
+    schedule_policy = policy
+
+def get_scheduler_stats():
+    if sample_ring is not None:
+        # the acquisition process's scheduler
+        return sample_ring.read_stats()
+    if sensor_scheduler is not None:
+        return sensor_scheduler.stats()
+    return None
 
 def get_sensor_value():
     global latest_sensor_value
-    return latest_sensor_value
\ No newline at end of file
+    if sample_ring is not None:
+        # written by the acquisition process
+        latest = sample_ring.latest()
+        return latest[2] if latest is not None else None
+    return latest_sensor_value
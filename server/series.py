@@ -0,0 +1,115 @@
+"""
+Load recorded Timestamp,Value CSVs into NumPy arrays.
+
+Timestamps become int64 nanoseconds on the CSV's own wall clock (see
+timeseries_store.to_ns), so they compare directly with the binary store
+and with datetime64 values parsed from query parameters.
+"""
+import csv
+import datetime
+from collections import namedtuple
+import numpy as np
+from timeseries_store import to_ns
+
+# labels keeps the original timestamp strings so responses echo them unchanged
+Series = namedtuple("Series", ["timestamps", "values", "labels"])
+
+# bytes before a parsed end offset compared to detect a rewritten file
+TAIL_CHECK = 64
+
+def _has_offset(label):
+    return label.endswith("Z") or "+" in label[10:] or "-" in label[19:]
+
+def parse_timestamp(label):
+    """One ISO-8601 string to ns; aware times are converted to local wall time like convert_csv."""
+    timestamp = datetime.datetime.fromisoformat(label)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return to_ns(timestamp)
+
+def parse_timestamps(labels):
+    if not labels:
+        return np.zeros(0, dtype=np.int64)
+    if not any(_has_offset(label) for label in labels):
+        return np.array(labels, dtype="datetime64[ns]").astype(np.int64)
+    return np.array([parse_timestamp(label) for label in labels], dtype=np.int64)
+
+def parse_values(values):
+    # read_sensor_loop writes False for failed reads
+    return np.array([float("nan") if v in ("False", "") else v for v in values], dtype=np.float64)
+
+def _parses(label, value):
+    try:
+        parse_timestamp(label)
+        if value not in ("False", ""):
+            float(value)
+    except ValueError:
+        return False
+    return True
+
+def read_csv_rows(path, offset=0, columns=None, stop=None):
+    """
+    Parse the Timestamp,Value rows of path from byte offset on, up to byte
+    stop (a line boundary) when given.
+
+    Returns (labels, values, columns, end, partial). columns is the
+    (timestamp, value) index pair from the header and has to be passed back
+    in once offset is past it. end is the offset just after the last
+    newline. partial is True when the last row came from a line without a
+    newline (possibly still being written); a later call from end reads it
+    again.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read() if stop is None else f.read(stop - offset)
+    end = offset + data.rfind(b"\n") + 1
+    complete, fragment = data[:end - offset].decode(), data[end - offset:].decode()
+    lines = complete.splitlines()
+    if columns is None:
+        if not lines:
+            return [], [], None, offset, False  # header not written yet
+        header = next(csv.reader(lines[:1]))
+        columns = (header.index("Timestamp"), header.index("Value"))
+        lines = lines[1:]
+    ts_col, value_col = columns
+    labels = []
+    values = []
+    for row in csv.reader(lines):
+        if len(row) <= max(ts_col, value_col):
+            continue
+        labels.append(row[ts_col])
+        values.append(row[value_col])
+    partial = False
+    if fragment:
+        row = next(csv.reader([fragment]))
+        if len(row) > max(ts_col, value_col) and _parses(row[ts_col], row[value_col]):
+            labels.append(row[ts_col])
+            values.append(row[value_col])
+            partial = True
+    return labels, values, columns, end, partial
+
+def read_tail(path, end):
+    """The TAIL_CHECK bytes before offset end, kept to tell a later append from a rewrite."""
+    start = max(0, end - TAIL_CHECK)
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start)
+
+def appended(path, size, end, tail):
+    """
+    Whether path, now size bytes, only grew since it was parsed up to end:
+    it is no shorter and still holds tail (read_tail) right before end.
+    """
+    if size < end:
+        return False
+    with open(path, "rb") as f:
+        f.seek(end - len(tail))
+        return f.read(len(tail)) == tail
+
+def load_csv(path):
+    labels, values, _, _, _ = read_csv_rows(path)
+    return Series(parse_timestamps(labels), parse_values(values), labels)
+
+def format_timestamps(timestamps):
+    return np.datetime_as_string(np.asarray(timestamps, dtype=np.int64).astype("datetime64[ns]")
+                                 .astype("datetime64[us]")).tolist()
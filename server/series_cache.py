@@ -0,0 +1,123 @@
+"""
+In-process cache of parsed recording CSVs for /dashboard and /list-csv.
+
+Parsed series are kept as NumPy arrays, keyed by path and validated by
+mtime and size on every lookup. A file that only grew since it was cached
+(today's recording) has just its new tail parsed, starting at the byte
+offset the previous parse stopped at. Entries are evicted least recently
+used first once their size passes max_bytes.
+
+Timestamp labels are held as one fixed-width bytes array rather than a
+list of str: a str object per row costs several times the int64/float64
+columns and would keep large files from fitting in the cache at all.
+"""
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from series import Series, read_csv_rows, parse_timestamps, parse_values, read_tail, appended
+
+class _Entry:
+    __slots__ = ("series", "mtime_ns", "size", "end", "columns", "partial", "tail", "nbytes")
+
+def _labels_array(labels):
+    return np.array(labels, dtype="S")
+
+def _series_nbytes(series):
+    return series.timestamps.nbytes + series.values.nbytes + series.labels.nbytes
+
+class SeriesCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._listings = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.tail_reads = 0
+        self.evictions = 0
+
+    def load(self, path):
+        """series.load_csv(path) with bytes labels, parsed at most once per change to the file."""
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry.series
+        if entry is not None and entry.columns is not None and appended(path, stat.st_size, entry.end, entry.tail):
+            entry = self._extend(path, entry, stat)
+            self.tail_reads += 1
+        else:
+            entry = self._parse(path, stat)
+            self.misses += 1
+        self._store(path, entry)
+        return entry.series
+
+    def _parse(self, path, stat):
+        labels, values, columns, end, partial = read_csv_rows(path)
+        series = Series(parse_timestamps(labels), parse_values(values), _labels_array(labels))
+        return self._entry(path, stat, series, columns, end, partial)
+
+    def _extend(self, path, entry, stat):
+        labels, values, columns, end, partial = read_csv_rows(path, entry.end, entry.columns)
+        old = entry.series
+        # a row cached from an unterminated last line is read again in full
+        keep = len(old.labels) - (1 if entry.partial else 0)
+        series = Series(np.concatenate((old.timestamps[:keep], parse_timestamps(labels))),
+                        np.concatenate((old.values[:keep], parse_values(values))),
+                        np.concatenate((old.labels[:keep], _labels_array(labels))))
+        return self._entry(path, stat, series, columns, end, partial)
+
+    def _entry(self, path, stat, series, columns, end, partial):
+        entry = _Entry()
+        entry.series = series
+        entry.mtime_ns = stat.st_mtime_ns
+        entry.size = stat.st_size
+        entry.end = end
+        entry.columns = columns
+        entry.partial = partial
+        entry.tail = read_tail(path, end)
+        entry.nbytes = _series_nbytes(series)
+        return entry
+
+    def _store(self, path, entry):
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            if entry.nbytes > self.max_bytes:
+                return
+            self._entries[path] = entry
+            self._bytes += entry.nbytes
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def clear(self):
+        """Forget every parsed file and listing; the counters keep running."""
+        with self._lock:
+            self._entries.clear()
+            self._listings.clear()
+            self._bytes = 0
+
+    def list_csv(self, directory):
+        """CSV file names in directory, re-listed only when the directory's mtime changes."""
+        mtime_ns = os.stat(directory).st_mtime_ns
+        with self._lock:
+            cached = self._listings.get(directory)
+            if cached is not None and cached[0] == mtime_ns:
+                return list(cached[1])
+        files = [f for f in os.listdir(directory) if f.endswith('.csv')]
+        with self._lock:
+            self._listings[directory] = (mtime_ns, files)
+        return list(files)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "tail_reads": self.tail_reads,
+                    "evictions": self.evictions}
@@ -0,0 +1,140 @@
+"""
+Per-sample filters for live weight, applied to single raw conversions.
+
+Averaging a batch of `readings` conversions per published sample (see
+HX711Base.get_raw_data_mean) lowers noise by spending reads: at 80 SPS a
+5-read batch caps the sample rate at 16 Hz and forgets everything before
+the batch. These filters instead keep state across samples, so every
+conversion can be published and still come out smooth:
+
+- EmaFilter: exponential moving average, y += alpha * (x - y);
+- MedianFilter: median of the last `window` conversions, kept in a ring
+  buffer plus a sorted copy; rejects spikes without smearing them;
+- KalmanFilter: 1-D constant-level Kalman filter. It converges like a long
+  average while the load is steady, and restarts from the measurement when
+  the innovation jumps more than `jump` standard deviations (something was
+  put on or taken off), so steps aren't smeared out.
+
+Filters take and return raw counts (floats on the way out) and chain in
+order:
+
+    stream_filter = make_stream_filter("median:5,kalman:4:400")
+    hx.get_filtered_reading(stream_filter)
+"""
+import bisect
+import collections
+
+class EmaFilter:
+    def __init__(self, alpha=0.2):
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+        self.value = None
+
+    def update(self, x):
+        if self.value is None:
+            self.value = float(x)
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+    def reset(self):
+        self.value = None
+
+class MedianFilter:
+    def __init__(self, window=5):
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self.window = int(window)
+        self._ring = collections.deque(maxlen=self.window)
+        self._sorted = []
+
+    def update(self, x):
+        if len(self._ring) == self.window:
+            # drop the conversion leaving the ring from the sorted copy
+            del self._sorted[bisect.bisect_left(self._sorted, self._ring[0])]
+        self._ring.append(x)
+        bisect.insort(self._sorted, x)
+        n = len(self._sorted)
+        if n % 2:
+            return float(self._sorted[n // 2])
+        return (self._sorted[n // 2 - 1] + self._sorted[n // 2]) / 2.0
+
+    def reset(self):
+        self._ring.clear()
+        self._sorted = []
+
+class KalmanFilter:
+    def __init__(self, process_var=4.0, measurement_var=400.0, jump=6.0):
+        """
+        process_var: how far (variance, counts^2) the true level may wander
+        between conversions; measurement_var: the ADC noise variance
+        (HX711_SIM_NOISE=20 is 400); jump: innovations larger than this
+        many standard deviations restart the estimate (0 disables).
+        """
+        if process_var < 0 or measurement_var <= 0:
+            raise ValueError("process_var must be >= 0 and measurement_var > 0")
+        self.process_var = process_var
+        self.measurement_var = measurement_var
+        self.jump = jump
+        self.value = None
+        self.variance = None
+
+    def update(self, x):
+        if self.value is None:
+            self.value, self.variance = float(x), self.measurement_var
+            return self.value
+        predicted_var = self.variance + self.process_var
+        innovation = x - self.value
+        innovation_var = predicted_var + self.measurement_var
+        if self.jump and innovation * innovation > self.jump * self.jump * innovation_var:
+            self.value, self.variance = float(x), self.measurement_var
+            return self.value
+        gain = predicted_var / innovation_var
+        self.value += gain * innovation
+        self.variance = (1.0 - gain) * predicted_var
+        return self.value
+
+    def reset(self):
+        self.value = None
+        self.variance = None
+
+class FilterChain:
+    """Runs each conversion through `filters` in order."""
+
+    def __init__(self, filters):
+        self.filters = list(filters)
+
+    def update(self, x):
+        for stream_filter in self.filters:
+            x = stream_filter.update(x)
+        return x
+
+    def reset(self):
+        for stream_filter in self.filters:
+            stream_filter.reset()
+
+STREAM_FILTERS = {
+    "ema": EmaFilter,
+    "median": MedianFilter,
+    "kalman": KalmanFilter,
+}
+
+def make_stream_filter(spec):
+    """
+    FilterChain from a spec like "median:5,ema:0.3": comma-separated
+    filter names, each optionally followed by its positional parameters
+    after colons. Raises ValueError for unknown names or bad parameters.
+    """
+    filters = []
+    for part in spec.split(","):
+        name, *params = part.strip().split(":")
+        try:
+            filter_class = STREAM_FILTERS[name]
+        except KeyError:
+            raise ValueError(f"Unknown stream filter: {name}. Options: {', '.join(STREAM_FILTERS)}")
+        try:
+            filters.append(filter_class(*[float(param) for param in params]))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Bad stream filter parameters in {part!r}: {e}")
+    return FilterChain(filters)
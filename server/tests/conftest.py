@@ -0,0 +1,7 @@
+import os
+import sys
+
+# the server modules import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# main creates its HX711 on import; never touch GPIO from the tests
+os.environ.setdefault("HX711_BACKEND", "sim")
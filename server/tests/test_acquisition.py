@@ -0,0 +1,17 @@
+from acquisition import SampleRing
+from scheduler import RateScheduler
+
+def test_ring_stats_match_the_scheduler():
+    ticks = iter(range(100))
+    scheduler = RateScheduler(10.0, policy="catchup", clock=lambda: next(ticks) * 0.15, sleep=lambda s: None)
+    for _ in range(5):
+        scheduler.wait()
+    ring = SampleRing(capacity=16)
+    try:
+        ring.publish_stats(scheduler.stats())
+        stats = ring.read_stats()
+    finally:
+        ring.close()
+    assert stats == scheduler.stats()
+    assert {field: type(value) for field, value in stats.items()} == \
+        {field: type(value) for field, value in scheduler.stats().items()}
@@ -0,0 +1,31 @@
+import rollups
+from bench.stages import make_csv
+
+def test_only_mean_is_answered_from_rollups(tmp_path, monkeypatch):
+    import main
+    import sensor
+    path = tmp_path / "2025-01-01.csv"
+    make_csv(str(path), 20000)
+    # one short spike the mean buckets would flatten
+    lines = path.read_text().splitlines(keepends=True)
+    label = lines[10001].split(",")[0]
+    lines[10001] = f"{label},1e9\n"
+    path.write_text("".join(lines))
+    rollup_dir = tmp_path / "rollups"
+    rollups.backfill(str(path), root_dir=str(rollup_dir))
+    monkeypatch.setattr(main, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(sensor, "ROLLUP_DIR", str(rollup_dir))
+    client = main.app.test_client()
+
+    def get(method):
+        response = client.get("/dashboard", query_string={"file": path.name, "points": 200, "method": method})
+        assert response.status_code == 200
+        return response.get_json()
+
+    mean = get("mean")
+    assert mean["tier"] in rollups.TIERS
+    assert "Min" in mean["data"][0]
+    for method in ("lttb", "minmax"):
+        picked = get(method)
+        assert "tier" not in picked
+        assert {"Timestamp": label, "Value": 1e9} in picked["data"]
@@ -0,0 +1,37 @@
+import os
+from bench.stages import make_csv
+from series_cache import SeriesCache
+
+def test_million_row_file_is_cached(tmp_path, monkeypatch):
+    import main
+    make_csv(str(tmp_path / "big.csv"), 1_000_000)
+    cache = SeriesCache()  # the default DASHBOARD_CACHE_MB budget
+    monkeypatch.setattr(main, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "series_cache", cache)
+    client = main.app.test_client()
+
+    first = client.get("/dashboard", query_string={"file": "big.csv", "points": 1200})
+    second = client.get("/dashboard", query_string={"file": "big.csv", "points": 1200})
+
+    assert first.status_code == second.status_code == 200
+    assert second.get_json() == first.get_json()
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert stats["bytes"] <= cache.max_bytes
+
+def test_labels_echo_the_csv(tmp_path):
+    path = os.path.join(tmp_path, "day.csv")
+    with open(path, "w") as f:
+        f.write("Timestamp,Value\n2025-06-11T14:00:00,1.5\n2025-06-11T14:00:00.500000,False\n")
+    cache = SeriesCache()
+    series = cache.load(path)
+    assert series.labels.astype(str).tolist() == ["2025-06-11T14:00:00", "2025-06-11T14:00:00.500000"]
+
+    with open(path, "a") as f:
+        f.write("2025-06-11T14:00:01,2.5\n")
+    series = cache.load(path)
+    assert cache.stats()["tail_reads"] == 1
+    assert series.labels.astype(str).tolist()[-1] == "2025-06-11T14:00:01"
+    assert series.values[-1] == 2.5
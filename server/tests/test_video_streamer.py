@@ -0,0 +1,42 @@
+import pytest
+from fake_camera import FakeCamera
+from video_encoders import OpenCVJpegEncoder
+from video_streamer import VideoStreamer
+
+class NoCodecCamera(FakeCamera):
+    """Builds camera encoders fine but can't start them, like a Pi 5 without a V4L2 M2M codec."""
+
+    def start_encoder(self, encoder, output, name="main"):
+        raise RuntimeError("failed to open /dev/video11")
+
+@pytest.fixture
+def make_streamer():
+    streamers = []
+
+    def make(**options):
+        streamer = VideoStreamer(camera=NoCodecCamera(), **options)
+        streamers.append(streamer)
+        return streamer
+
+    yield make
+    for streamer in streamers:
+        streamer.release()
+
+def test_auto_falls_back_to_opencv_when_the_camera_encoder_fails_to_start(make_streamer):
+    streamer = make_streamer(encoder="auto")
+    assert streamer.encoder.push
+
+    streamer.add_viewer()
+    assert isinstance(streamer.encoder, OpenCVJpegEncoder)
+    seq, jpeg = streamer.wait_jpeg(timeout=2.0)
+    assert jpeg is not None and jpeg.startswith(b"\xff\xd8")
+
+    streamer.remove_viewer()
+    assert streamer.viewers == 0
+
+def test_explicit_camera_encoder_reports_start_failure(make_streamer):
+    streamer = make_streamer(encoder="mjpeg")
+    with pytest.raises(RuntimeError):
+        streamer.add_viewer()
+    assert streamer.viewers == 0
+    assert streamer.encoder.push
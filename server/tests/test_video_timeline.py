@@ -0,0 +1,38 @@
+import os
+import video_timeline
+from video_timeline import FrameIndexCache, FrameIndexWriter, frames_between, frame_time, indexed_segments
+
+def write_segment(video_dir, name, first, frames, step=1.0 / 30):
+    path = os.path.join(video_dir, name)
+    writer = FrameIndexWriter(path)
+    for n in range(frames):
+        writer.write(first + n * step)
+    writer.close()
+    return path, writer
+
+def test_segments_are_listed_without_loading_their_indexes(tmp_path, monkeypatch):
+    cache = FrameIndexCache(max_bytes=4000)  # room for one 200-frame index
+    monkeypatch.setattr(video_timeline, "_index_cache", cache)
+    video_dir = str(tmp_path)
+    a, writer_a = write_segment(video_dir, "a.avi", 100.0, 200)
+    b, writer_b = write_segment(video_dir, "b.avi", 110.0, 200)
+    wall = lambda writer, t: writer.anchor_wall_ns + int(t * 1e9) - writer.anchor_monotonic_ns
+
+    segments = indexed_segments(video_dir)
+    assert [segment for _, _, segment in segments] == [a, b]
+    assert segments[0][:2] == (wall(writer_a, 100.0), wall(writer_a, 100.0 + 199 / 30))
+    assert cache.stats()["entries"] == 0
+
+    found = frames_between(video_dir, wall(writer_b, 110.0), wall(writer_b, 110.1))
+    assert [(segment, n) for segment, n, _ in found] == [(b, 0), (b, 1), (b, 2), (b, 3)]
+    assert frame_time(b, 3) == found[3][2]
+    assert cache.stats()["entries"] == 1
+
+    frames_between(video_dir, wall(writer_a, 100.0), wall(writer_b, 110.0))
+    stats = cache.stats()
+    assert stats["entries"] == 1 and stats["bytes"] <= stats["max_bytes"]
+
+    os.remove(a + video_timeline.INDEX_EXTENSION)
+    os.remove(b + video_timeline.INDEX_EXTENSION)
+    assert indexed_segments(video_dir) == []
+    assert cache.stats()["entries"] == 0
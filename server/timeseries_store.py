@@ -0,0 +1,263 @@
+"""
+Append-only binary storage for weight recordings.
+
+One directory per day under data/series/<date>/ holds fixed-width records
+split into chunk files plus an index:
+
+    chunk-00000.wts   32-byte header + RECORD_DTYPE records
+    chunk-00001.wts
+    index.bin         one INDEX_DTYPE entry per sealed (full) chunk
+
+A record is 16 bytes (int64 ns timestamp, float32 weight, int32 raw),
+against ~40 bytes for a CSV row. Readers memory-map chunks straight into
+NumPy arrays, and export_csv writes the familiar Timestamp,Value CSV.
+
+    python timeseries_store.py info data/series/2025-06-11
+    python timeseries_store.py export data/series/2025-06-11 out.csv
+    python timeseries_store.py convert data/2025-06-11.csv
+"""
+import datetime
+import os
+import struct
+import sys
+import time
+import numpy as np
+
+MAGIC = b"WTS1"
+VERSION = 1
+HEADER = struct.Struct("<4sHHqq8x")  # magic, version, record size, created ns, chunk number
+HEADER_SIZE = HEADER.size
+
+RECORD_DTYPE = np.dtype([("timestamp_ns", "<i8"), ("weight", "<f4"), ("raw", "<i4")])
+INDEX_DTYPE = np.dtype([("chunk", "<u4"), ("count", "<u4"), ("first_ns", "<i8"), ("last_ns", "<i8")])
+
+# raw value stored for samples where the ADC read failed (weight is NaN)
+RAW_MISSING = np.iinfo(np.int32).min
+
+SERIES_DIR = os.path.join(os.path.dirname(__file__), 'data', 'series')
+
+def chunk_name(number):
+    return f"chunk-{number:05d}.wts"
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_US = datetime.timedelta(microseconds=1)
+
+def to_ns(timestamp):
+    """
+    Naive local datetime (as written to the CSVs) to nanoseconds since
+    1970-01-01T00:00 on the same wall clock. No timezone is applied, so this
+    matches numpy's datetime64 parsing of the CSV strings exactly.
+    """
+    return (timestamp - _EPOCH) // _US * 1000
+
+def from_ns(timestamp_ns):
+    return _EPOCH + datetime.timedelta(microseconds=int(timestamp_ns) // 1000)
+
+def _write_header(f, number):
+    f.write(HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize, time.time_ns(), number))
+
+def _check_header(path, header):
+    magic, version, record_size, _, _ = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} is not a version {VERSION} weight series chunk")
+
+class BinarySeriesWriter:
+    """
+    Appends samples to the day directory matching each sample's date.
+    Same write/flush/close shape as csv_writer.BufferedCsvWriter: records go
+    into a preallocated array and hit the disk every flush_records samples
+    or flush_interval seconds.
+    """
+
+    def __init__(self, root_dir=SERIES_DIR, chunk_records=65536, flush_records=50,
+                 flush_interval=5.0, fsync=False, clock=time.monotonic):
+        self.root_dir = root_dir
+        self.chunk_records = chunk_records
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._clock = clock
+        self._buffer = np.zeros(flush_records, dtype=RECORD_DTYPE)
+        self._pending = 0
+        self._file = None
+        self._day = None
+        self._day_dir = None
+        self._chunk = 0
+        self._chunk_count = 0
+        self._chunk_first_ns = None
+        self._last_flush = clock()
+
+    def write(self, timestamp, value, raw=None):
+        day = timestamp.date()
+        if day != self._day:
+            self._open_day(day)
+        if self._chunk_count + self._pending >= self.chunk_records:
+            self._seal_chunk()
+        record = self._buffer[self._pending]
+        record["timestamp_ns"] = to_ns(timestamp)
+        record["weight"] = np.nan if value is False or value is None else value
+        record["raw"] = RAW_MISSING if raw is None else raw
+        self._pending += 1
+        if (self._pending >= self.flush_records
+                or self._clock() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def _open_day(self, day):
+        self.close()
+        self._day = day
+        self._day_dir = os.path.join(self.root_dir, str(day))
+        os.makedirs(self._day_dir, exist_ok=True)
+        sealed = read_index(self._day_dir)
+        self._chunk = int(sealed["chunk"][-1]) + 1 if len(sealed) else 0
+        self._open_chunk()
+
+    def _open_chunk(self):
+        path = os.path.join(self._day_dir, chunk_name(self._chunk))
+        self._file = open(path, "ab")
+        size = self._file.seek(0, os.SEEK_END)
+        if size < HEADER_SIZE:
+            # new chunk, or a crash before the header made it to disk
+            self._file.truncate(0)
+            _write_header(self._file, self._chunk)
+            self._chunk_count = 0
+            self._chunk_first_ns = None
+            return
+        # resume an unsealed chunk after a restart, dropping a torn last record
+        count = (size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        self._file.truncate(HEADER_SIZE + count * RECORD_DTYPE.itemsize)
+        self._chunk_count = count
+        self._chunk_first_ns = None
+        if count:
+            first = np.fromfile(path, dtype=RECORD_DTYPE, count=1, offset=HEADER_SIZE)
+            self._chunk_first_ns = int(first["timestamp_ns"][0])
+        if count >= self.chunk_records:
+            self._seal_chunk()
+
+    def _seal_chunk(self):
+        self.flush()
+        path = os.path.join(self._day_dir, chunk_name(self._chunk))
+        last = np.fromfile(path, dtype=RECORD_DTYPE, count=1,
+                           offset=HEADER_SIZE + (self._chunk_count - 1) * RECORD_DTYPE.itemsize)
+        entry = np.array([(self._chunk, self._chunk_count, self._chunk_first_ns,
+                           last["timestamp_ns"][0])], dtype=INDEX_DTYPE)
+        self._file.close()
+        with open(os.path.join(self._day_dir, "index.bin"), "ab") as f:
+            f.write(entry.tobytes())
+        self._chunk += 1
+        self._open_chunk()
+
+    def flush(self):
+        if self._file is None:
+            return
+        if self._pending:
+            records = self._buffer[:self._pending]
+            if self._chunk_first_ns is None:
+                self._chunk_first_ns = int(records["timestamp_ns"][0])
+            self._file.write(records.tobytes())
+            self._chunk_count += self._pending
+            self._pending = 0
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._last_flush = self._clock()
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+        self._day = None
+
+def read_index(day_dir):
+    path = os.path.join(day_dir, "index.bin")
+    if not os.path.exists(path):
+        return np.zeros(0, dtype=INDEX_DTYPE)
+    return np.fromfile(path, dtype=INDEX_DTYPE)
+
+def open_chunk(path):
+    """Memory-map a chunk's records (empty array for a chunk with none yet)."""
+    with open(path, "rb") as f:
+        _check_header(path, f.read(HEADER_SIZE))
+    count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if count <= 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+class SeriesReader:
+    """Read-only view of one day directory."""
+
+    def __init__(self, day_dir):
+        self.day_dir = day_dir
+        self.index = read_index(day_dir)
+        numbers = sorted(int(name[6:11]) for name in os.listdir(day_dir)
+                         if name.startswith("chunk-") and name.endswith(".wts"))
+        self.chunks = [os.path.join(day_dir, chunk_name(n)) for n in numbers]
+
+    def __len__(self):
+        sealed = int(self.index["count"].sum())
+        tail = self.chunks[len(self.index):]
+        return sealed + sum(len(open_chunk(path)) for path in tail)
+
+    def records(self):
+        """All records; a zero-copy memmap for a single chunk, a concatenation otherwise."""
+        parts = [open_chunk(path) for path in self.chunks]
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts)
+
+    def arrays(self):
+        """(timestamps_ns int64, weights float32, raws int32) for the whole day."""
+        records = self.records()
+        return records["timestamp_ns"], records["weight"], records["raw"]
+
+def export_csv(day_dir, out_path):
+    """Write the day as a Timestamp,Value CSV like read_sensor_loop's; failed reads become False."""
+    records = SeriesReader(day_dir).records()
+    with open(out_path, "w", newline="") as f:
+        f.write("Timestamp,Value\n")
+        for start in range(0, len(records), 10000):
+            block = records[start:start + 10000]
+            f.write("".join(
+                f"{from_ns(ts).isoformat()},{'False' if np.isnan(w) else float(w)}\n"
+                for ts, w in zip(block["timestamp_ns"].tolist(), block["weight"].tolist())))
+    return len(records)
+
+def convert_csv(csv_path, root_dir=SERIES_DIR, chunk_records=65536):
+    """Append a Timestamp,Value CSV into the binary store. Returns the number of rows."""
+    import csv
+    writer = BinarySeriesWriter(root_dir, chunk_records=chunk_records, flush_records=4096,
+                                flush_interval=float("inf"))
+    rows = 0
+    try:
+        with open(csv_path, newline="") as f:
+            for row in csv.DictReader(f):
+                timestamp = datetime.datetime.fromisoformat(row["Timestamp"])
+                if timestamp.tzinfo is not None:
+                    timestamp = timestamp.astimezone().replace(tzinfo=None)
+                value = False if row["Value"] == "False" else float(row["Value"])
+                writer.write(timestamp, value)
+                rows += 1
+    finally:
+        writer.close()
+    return rows
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("info", "export", "convert"):
+        print(__doc__)
+        sys.exit(1)
+    command, path = sys.argv[1], sys.argv[2]
+    if command == "info":
+        reader = SeriesReader(path)
+        timestamps = reader.arrays()[0]
+        print(f"{len(reader.chunks)} chunks, {len(reader.index)} sealed, {len(timestamps)} records")
+        if len(timestamps):
+            print(f"{from_ns(timestamps[0]).isoformat()} .. {from_ns(timestamps[-1]).isoformat()}")
+    elif command == "export":
+        out = sys.argv[3] if len(sys.argv) > 3 else os.path.basename(os.path.normpath(path)) + ".csv"
+        print(f"Exported {export_csv(path, out)} rows to {out}")
+    else:
+        print(f"Converted {convert_csv(path)} rows from {path}")
@@ -0,0 +1,100 @@
+"""
+JPEG encoders behind VideoStreamer's /video_feed frames.
+
+Two kinds:
+
+- pull encoders (OpenCVJpegEncoder) turn each captured array into JPEG
+  bytes on the CPU when a viewer asks for it;
+- push encoders (CameraJpegEncoder) have the camera pipeline produce the
+  JPEGs itself, through Picamera2's MJPEGEncoder (the Pi's hardware codec)
+  or JpegEncoder, and hand each one to VideoStreamer.publish_jpeg.
+
+create_encoder() picks one by name; "auto" tries the camera's MJPEG
+encoder and falls back to OpenCV.
+"""
+import cv2
+
+ENCODERS = ("auto", "opencv", "mjpeg", "jpeg")
+
+class OpenCVJpegEncoder:
+    push = False
+
+    def __init__(self, quality=80):
+        self.quality = quality
+
+    def start(self, camera, streamer):
+        pass
+
+    def encode(self, frame):
+        ret, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return jpeg.tobytes() if ret else None
+
+    def stop(self):
+        pass
+
+def callback_output(callback):
+    """A Picamera2 output handing each encoded frame and its timestamp to callback."""
+    try:
+        from picamera2.outputs import Output
+    except ImportError:  # FakeCamera takes any object with outputframe()
+        Output = object
+
+    class CallbackOutput(Output):
+        def outputframe(self, frame, keyframe=True, timestamp=None, *args, **kwargs):
+            callback(bytes(frame), timestamp)
+
+    return CallbackOutput()
+
+def _camera_encoder_classes(camera):
+    # fake_camera.FakeCamera brings its own stand-ins
+    classes = getattr(camera, "encoder_classes", None)
+    if classes is not None:
+        return classes
+    from picamera2.encoders import MJPEGEncoder, JpegEncoder
+    return {"mjpeg": MJPEGEncoder, "jpeg": JpegEncoder}
+
+class CameraJpegEncoder:
+    """JPEGs straight from the camera pipeline, started alongside capture on the main stream."""
+
+    push = True
+
+    def __init__(self, kind="mjpeg", quality=80):
+        self.kind = kind
+        self.quality = quality
+        self._camera = None
+        self._encoder = None
+
+    def _create(self, camera):
+        encoder_class = _camera_encoder_classes(camera)[self.kind]
+        # JpegEncoder takes a quality, the hardware MJPEGEncoder a bitrate (its default)
+        return encoder_class(q=self.quality) if self.kind == "jpeg" else encoder_class()
+
+    def available(self, camera):
+        """
+        Whether camera can provide this encoder; builds one without starting
+        it, so a codec device that only fails to open in start() passes.
+        """
+        try:
+            self._create(camera)
+        except Exception as e:
+            print(f"[DEBUG] CameraJpegEncoder: {self.kind} encoder unavailable ({e})")
+            return False
+        return True
+
+    def start(self, camera, streamer):
+        self._encoder = self._create(camera)
+        camera.start_encoder(self._encoder, callback_output(streamer.publish_jpeg), name="main")
+        self._camera = camera
+
+    def stop(self):
+        if self._camera is not None:
+            self._camera.stop_encoder(self._encoder)
+            self._camera = None
+            self._encoder = None
+
+def create_encoder(name="auto", quality=80):
+    if name not in ENCODERS:
+        raise ValueError(f"Unknown video encoder: {name}")
+    if name == "opencv":
+        return OpenCVJpegEncoder(quality)
+    return CameraJpegEncoder("mjpeg" if name == "auto" else name, quality)
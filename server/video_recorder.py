@@ -0,0 +1,351 @@
+"""
+Segmented video recording off the capture thread.
+
+SegmentedRecorder takes frames from the capture loop through submit(),
+which only queues a reference (capture_array returns a new array per
+frame), so slow SD-card writes never stall capture or /video_feed. When
+the queue is full the oldest frame is dropped and counted. Its thread
+writes rolling segments named <prefix>-YYYYmmdd-HHMMSS.avi, starting a
+new one after segment_seconds or segment_bytes, and stamps every closed
+segment with the frame rate actually recorded.
+
+Codecs:
+
+- "xvid": OpenCV VideoWriter, re-encoding BGR frames;
+- "mjpg": JPEGs written as they are (from the camera's MJPEG encoder or
+  the /video_feed encoder) into an AVI by MjpegAviWriter, no re-encode;
+- "h264": CameraH264Recorder, the camera's H.264 encoder writing MP4
+  segments through Picamera2's FfmpegOutput.
+
+Every segment gets a video_timeline frame index (<segment>.frames) with
+the capture time of each frame it holds, so recordings can be lined up
+with the weight samples.
+
+prune_segments() keeps a recording directory under a byte budget by
+deleting the oldest segments along with their frame indexes.
+"""
+import collections
+import datetime
+import os
+import struct
+import threading
+import time
+import cv2
+import numpy as np
+from video_encoders import callback_output
+from video_timeline import FrameIndexWriter, frame_index_path
+
+CODECS = ("xvid", "mjpg", "h264")
+SEGMENT_EXTENSIONS = (".avi", ".mp4")
+
+def segment_name(directory, prefix, extension):
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(directory, f"{prefix}-{stamp}{extension}")
+    n = 1
+    while os.path.exists(path):
+        path = os.path.join(directory, f"{prefix}-{stamp}-{n}{extension}")
+        n += 1
+    return path
+
+def prune_segments(directory, budget_bytes, keep=()):
+    """Delete the oldest segments in directory until they fit in budget_bytes. Returns the deleted paths."""
+    segments = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.endswith(SEGMENT_EXTENSIONS) and os.path.isfile(path):
+            stat = os.stat(path)
+            segments.append((stat.st_mtime, stat.st_size, path))
+    segments.sort()
+    total = sum(size for _, size, _ in segments)
+    deleted = []
+    for _, size, path in segments:
+        if total <= budget_bytes:
+            break
+        if path in keep:
+            continue
+        os.remove(path)
+        index = frame_index_path(path)
+        if os.path.exists(index):
+            os.remove(index)
+        total -= size
+        deleted.append(path)
+    return deleted
+
+# RIFF AVI headers, see MjpegAviWriter._header
+_AVIH = struct.Struct("<14I")
+_STRH = struct.Struct("<4s4sIHHIIIIIIiI4h")
+_STRF = struct.Struct("<IiiHHIIiiII")
+_AVIF_HASINDEX = 0x10
+_AVIIF_KEYFRAME = 0x10
+_MOVI_OFFSET = 220  # position of the "movi" fourcc with this header layout
+
+class MjpegAviWriter:
+    """Minimal AVI muxer for ready-made JPEG frames (one '00dc' chunk each, plus an idx1 index)."""
+
+    def __init__(self, filename, size):
+        self.current_path = filename
+        self.size = size
+        self.frames = 0
+        self._index = []
+        self._max_chunk = 0
+        self._file = open(filename, "wb")
+        self._file.write(self._header(25.0, 0))
+
+    def _header(self, fps, movi_size):
+        width, height = self.size
+        scale, rate = 1000, max(1, round(fps * 1000))
+        avih = _AVIH.pack(round(1e6 / fps), 0, 0, _AVIF_HASINDEX, self.frames, 0, 1, self._max_chunk,
+                          width, height, 0, 0, 0, 0)
+        strh = _STRH.pack(b"vids", b"MJPG", 0, 0, 0, 0, scale, rate, 0, self.frames, self._max_chunk,
+                          -1, 0, 0, 0, width, height)
+        strf = _STRF.pack(40, width, height, 1, 24, int.from_bytes(b"MJPG", "little"),
+                          width * height * 3, 0, 0, 0, 0)
+        strl = b"strl" + b"strh" + struct.pack("<I", len(strh)) + strh + b"strf" + struct.pack("<I", len(strf)) + strf
+        hdrl = (b"hdrl" + b"avih" + struct.pack("<I", len(avih)) + avih
+                + b"LIST" + struct.pack("<I", len(strl)) + strl)
+        riff_size = 4 + 8 + len(hdrl) + 8 + 4 + movi_size + 8 + 16 * len(self._index)
+        return (b"RIFF" + struct.pack("<I", riff_size) + b"AVI " + b"LIST" + struct.pack("<I", len(hdrl)) + hdrl
+                + b"LIST" + struct.pack("<I", 4 + movi_size) + b"movi")
+
+    def write(self, jpeg):
+        offset = self._file.tell() - _MOVI_OFFSET
+        self._file.write(b"00dc" + struct.pack("<I", len(jpeg)) + jpeg)
+        if len(jpeg) % 2:
+            self._file.write(b"\0")
+        self._index.append((offset, len(jpeg)))
+        self._max_chunk = max(self._max_chunk, len(jpeg))
+        self.frames += 1
+
+    def tell(self):
+        return self._file.tell()
+
+    def close(self, fps):
+        movi_size = self._file.tell() - _MOVI_OFFSET - 4
+        self._file.write(b"idx1" + struct.pack("<I", 16 * len(self._index)))
+        self._file.write(b"".join(struct.pack("<4sIII", b"00dc", _AVIIF_KEYFRAME, offset, size)
+                                  for offset, size in self._index))
+        self._file.seek(0)
+        self._file.write(self._header(fps, movi_size))
+        self._file.close()
+
+def patch_avi_fps(path, fps):
+    """Rewrite the frame rate in an AVI's main and video stream headers in place."""
+    with open(path, "r+b") as f:
+        head = f.read(4096)
+        avih = head.find(b"avih")
+        # "strh", its 4-byte size, then the stream type; the video stream is the "vids" one
+        strh = head.find(b"strh")
+        while strh >= 0 and head[strh + 8:strh + 12] != b"vids":
+            strh = head.find(b"strh", strh + 4)
+        if avih < 0 or strh < 0:
+            return False
+        f.seek(avih + 8)
+        f.write(struct.pack("<I", round(1e6 / fps)))
+        f.seek(strh + 8 + 20)  # dwScale, dwRate
+        f.write(struct.pack("<II", 1000, max(1, round(fps * 1000))))
+    return True
+
+class SegmentedRecorder:
+    def __init__(self, directory, prefix, codec="xvid", fps=30.0, size=(640, 480), encode=None,
+                 segment_seconds=600.0, segment_bytes=None, retention_bytes=None, queue_size=64):
+        """
+        encode turns a BGR frame into JPEG bytes, for "mjpg" when frames
+        arrive as arrays rather than ready-made JPEGs.
+        """
+        if codec not in ("xvid", "mjpg"):
+            raise ValueError(f"SegmentedRecorder codec must be xvid or mjpg, not {codec}")
+        self.directory = directory
+        self.prefix = prefix
+        self.codec = codec
+        self.fps = fps
+        self.size = size
+        self.encode = encode
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = segment_bytes
+        self.retention_bytes = retention_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.segments = []
+        self._writer = None
+        self._frame_index = None
+        self._segment_frames = 0
+        self._segment_first = None
+        self._segment_last = None
+        self._queue = collections.deque(maxlen=queue_size)
+        self._ready = threading.Condition()
+        self._running = True
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        # opened up front so the first segment's name is known as soon as recording starts
+        self._open_segment()
+        self._thread = threading.Thread(target=self._run, name="video-recorder", daemon=True)
+        self._thread.start()
+
+    @property
+    def current_path(self):
+        """The segment being written (the last one once stopped)."""
+        return self.segments[-1] if self.segments else None
+
+    def submit(self, frame, timestamp=None):
+        """Queue a BGR array or, for "mjpg", JPEG bytes; timestamp is time.monotonic() at capture."""
+        with self._ready:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append((frame, time.monotonic() if timestamp is None else timestamp))
+            self.submitted += 1
+            self._ready.notify()
+
+    def _run(self):
+        while True:
+            with self._ready:
+                self._ready.wait_for(lambda: self._queue or not self._running)
+                if not self._queue:
+                    break
+                frame, timestamp = self._queue.popleft()
+            self._write(frame, timestamp)
+        self._close_segment()
+
+    def _segment_full(self, timestamp):
+        if self._segment_first is not None and timestamp - self._segment_first >= self.segment_seconds:
+            return True
+        return bool(self.segment_bytes) and os.path.getsize(self.current_path) >= self.segment_bytes
+
+    def _write(self, frame, timestamp):
+        if self._writer is not None and self._segment_full(timestamp):
+            self._close_segment()
+        if self._writer is None:
+            self._open_segment()
+        if self.codec == "mjpg":
+            if isinstance(frame, np.ndarray):
+                frame = self.encode(frame)
+            if not frame:
+                return
+        self._writer.write(frame)
+        self._frame_index.write(timestamp)
+        if self._segment_first is None:
+            self._segment_first = timestamp
+        self._segment_last = timestamp
+        self._segment_frames += 1
+        self.written += 1
+
+    def _open_segment(self):
+        path = segment_name(self.directory, self.prefix, ".avi")
+        if self.codec == "mjpg":
+            self._writer = MjpegAviWriter(path, self.size)
+        else:
+            self._writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"XVID"), self.fps, self.size)
+            if not self._writer.isOpened():
+                raise RuntimeError(f"Could not open {path} for writing.")
+        self._frame_index = FrameIndexWriter(path)
+        self.segments.append(path)
+        self._segment_frames = 0
+        self._segment_first = self._segment_last = None
+
+    def _measured_fps(self):
+        if self._segment_frames > 1 and self._segment_last > self._segment_first:
+            return (self._segment_frames - 1) / (self._segment_last - self._segment_first)
+        return self.fps
+
+    def _close_segment(self):
+        if self._writer is None:
+            return
+        fps = self._measured_fps()
+        if self.codec == "mjpg":
+            self._writer.close(fps)
+        else:
+            self._writer.release()
+            if not patch_avi_fps(self.current_path, fps):
+                print(f"[DEBUG] Could not find the AVI headers of {self.current_path}; it keeps the nominal {self.fps} fps")
+        self._frame_index.close()
+        self._writer = None
+        self._frame_index = None
+        print(f"[DEBUG] Recorded segment {self.current_path}: {self._segment_frames} frames at {fps:.2f} fps")
+        if self.retention_bytes:
+            for path in prune_segments(self.directory, self.retention_bytes, keep=(self.current_path,)):
+                print(f"[DEBUG] Pruned old segment {path}")
+
+    def stop(self):
+        """Write out whatever is still queued and close the current segment."""
+        with self._ready:
+            self._running = False
+            self._ready.notify()
+        self._thread.join()
+
+    def stats(self):
+        return {"codec": self.codec, "current_path": self.current_path, "segments": len(self.segments),
+                "submitted": self.submitted, "written": self.written, "dropped": self.dropped,
+                "queued": len(self._queue)}
+
+class CameraH264Recorder:
+    """
+    H.264 from the camera's encoder into rolling MP4 segments. Frames never
+    pass through Python; segments rotate by stopping and restarting the
+    encoder with a new output. A second output on the encoder stamps each
+    encoded frame into the segment's frame index as it comes out.
+    """
+
+    codec = "h264"
+
+    def __init__(self, camera, directory, prefix, fps=30.0, segment_seconds=600.0, segment_bytes=None,
+                 retention_bytes=None):
+        from picamera2.encoders import H264Encoder
+        from picamera2.outputs import FfmpegOutput
+        self._encoder_class = H264Encoder
+        self._output_class = FfmpegOutput
+        self.camera = camera
+        self.directory = directory
+        self.prefix = prefix
+        self.fps = fps
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = segment_bytes
+        self.retention_bytes = retention_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.segments = []
+        self.dropped = 0
+        self._encoder = None
+        self._stop = threading.Event()
+        self._open_segment()
+        self._thread = threading.Thread(target=self._run, name="h264-segments", daemon=True)
+        self._thread.start()
+
+    @property
+    def current_path(self):
+        """The segment being written (the last one once stopped)."""
+        return self.segments[-1] if self.segments else None
+
+    def submit(self, frame, timestamp=None):
+        pass  # the camera feeds the encoder directly
+
+    def _open_segment(self):
+        path = segment_name(self.directory, self.prefix, ".mp4")
+        self._encoder = self._encoder_class(framerate=self.fps)
+        frame_index = self._frame_index = FrameIndexWriter(path)
+        stamp = callback_output(lambda frame, timestamp: frame_index.write(time.monotonic()))
+        self.camera.start_encoder(self._encoder, [self._output_class(path), stamp], name="main")
+        self.segments.append(path)
+        self._segment_start = time.monotonic()
+
+    def _close_segment(self):
+        self.camera.stop_encoder(self._encoder)
+        self._encoder = None
+        self._frame_index.close()
+        if self.retention_bytes:
+            for path in prune_segments(self.directory, self.retention_bytes, keep=(self.current_path,)):
+                print(f"[DEBUG] Pruned old segment {path}")
+
+    def _run(self):
+        while not self._stop.wait(1.0):
+            too_long = time.monotonic() - self._segment_start >= self.segment_seconds
+            too_big = (self.segment_bytes and os.path.exists(self.current_path)
+                       and os.path.getsize(self.current_path) >= self.segment_bytes)
+            if too_long or too_big:
+                self._close_segment()
+                self._open_segment()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._close_segment()
+
+    def stats(self):
+        return {"codec": self.codec, "current_path": self.current_path, "segments": len(self.segments)}
@@ -1,29 +1,74 @@
 import threading
 import time
 import numpy as np
-from picamera2 import Picamera2, Preview
-import cv2
+try:
+    from picamera2 import Picamera2
+except ImportError:  # allows the server to run on machines without a camera stack
+    Picamera2 = None
 import os
+from video_encoders import OpenCVJpegEncoder, create_encoder
+from scheduler import RateScheduler, MIN_RATE_HZ
+from video_recorder import SegmentedRecorder, CameraH264Recorder
+
+# highest capture rate the camera modes offer at 640x480
+MAX_FPS = 120.0
 
 class CameraBusyException(Exception):
     pass
 
 class VideoStreamer:
-    def __init__(self):
-
+    def __init__(self, camera=None, encoder="auto", fps=30.0, idle_fps=1.0, recording=None):
+        """
+        camera defaults to a new Picamera2 (fake_camera.FakeCamera works too);
+        encoder is a video_encoders name or encoder object. Frames are
+        captured at fps while someone watches or records, at idle_fps
+        otherwise; an idle_fps of 0 stops capturing until then. recording
+        holds start_recording's codec, segment_seconds, segment_bytes and
+        retention_bytes. Raises ValueError for rates out of range.
+        """
+        # checked here: the capture thread has nobody to report to
+        if not MIN_RATE_HZ <= fps <= MAX_FPS:
+            raise ValueError(f"Video fps must be between {MIN_RATE_HZ} and {MAX_FPS}")
+        if idle_fps and not MIN_RATE_HZ <= idle_fps <= fps:
+            raise ValueError(f"Video idle fps must be 0 or between {MIN_RATE_HZ} and the fps ({fps})")
+        if camera is None and Picamera2 is None:
+            raise RuntimeError("picamera2 is not installed.")
         try:
-            self.picam2 = Picamera2()
+            self.picam2 = camera if camera is not None else Picamera2()
             # Configure camera
+            # "RGB888" arrays are laid out B, G, R: what OpenCV expects, no conversion needed
             video_config = self.picam2.create_video_configuration(
-                main={"size": (640, 480), "format": "RGB888"}
+                main={"size": (640, 480), "format": "RGB888"},
+                controls={"FrameRate": fps},
             )
             self.picam2.configure(video_config)
             self.picam2.start()
             self.recording = False
-            self.writer = None
+            self.recorder = None
+            self.recording_options = recording or {}
+            # "mjpg" recordings with a camera encoder take its JPEGs instead of frames
+            self._record_jpegs = False
+            # the running recorder is fed captured frames (not JPEGs, not the camera's H.264)
+            self._record_frames = False
             self.frame = None
             self.lock = threading.Lock()
+            # frame_seq counts captured frames; frame_ready is notified on each one
+            self.frame_seq = 0
+            self.frame_ready = threading.Condition(self.lock)
+            # JPEG of frame _jpeg_seq, shared by every viewer
+            self._encode_lock = threading.Lock()
+            self._jpeg = None
+            self._jpeg_seq = 0
             self.running = True
+            self.fps = fps
+            self.idle_fps = idle_fps
+            self.scheduler = None
+            # /video_feed clients, see add_viewer()
+            self.viewers = 0
+            self._viewer_lock = threading.Lock()
+            # viewers plus an mjpg recording using the camera encoder
+            self._encoder_users = 0
+            self.encoder = self._start_encoder(encoder)
             self.thread = threading.Thread(target=self._update_frame, daemon=True)
             self.thread.start()
             print(f"[DEBUG] VideoStreamer thread started: {self.thread.is_alive()}")
@@ -33,58 +78,210 @@ class VideoStreamer:
             else:
                 raise
 
+    def _start_encoder(self, encoder):
+        # "auto" also falls back when the camera encoder fails to start, see _acquire_encoder()
+        self._encoder_fallback = encoder == "auto"
+        if isinstance(encoder, str):
+            encoder = create_encoder(encoder)
+        if not encoder.push:
+            return encoder
+        # started by the first viewer, see add_viewer()
+        if encoder.available(self.picam2):
+            print(f"[DEBUG] VideoStreamer: camera {encoder.kind} encoder available")
+            return encoder
+        print("[DEBUG] VideoStreamer: camera encoder unavailable, using OpenCV")
+        return OpenCVJpegEncoder(encoder.quality)
+
+    def publish_jpeg(self, jpeg, timestamp=None):
+        """Called by push encoders with each JPEG the camera produced."""
+        with self.lock:
+            self._jpeg = jpeg
+            self._jpeg_seq += 1
+            self.frame_ready.notify_all()
+        recorder = self.recorder
+        if recorder is not None and self._record_jpegs:
+            recorder.submit(jpeg)
+
+    def _acquire_encoder(self):
+        """
+        Count a user of the camera encoder, starting it for the first. If it
+        can't start, "auto" switches to OpenCV for good; other encoders raise.
+        """
+        with self._viewer_lock:
+            if self.encoder.push and self._encoder_users == 0:
+                try:
+                    self.encoder.start(self.picam2, self)
+                except Exception as e:
+                    # e.g. MJPEGEncoder only opens the codec device here, and a Pi 5 has none
+                    if not self._encoder_fallback:
+                        raise
+                    print(f"[DEBUG] VideoStreamer: camera {self.encoder.kind} encoder failed to start ({e}), using OpenCV")
+                    self.encoder = OpenCVJpegEncoder(self.encoder.quality)
+            self._encoder_users += 1
+
+    def _release_encoder(self):
+        with self._viewer_lock:
+            self._encoder_users -= 1
+            if self.encoder.push and self._encoder_users == 0:
+                self.encoder.stop()
+
+    def add_viewer(self):
+        """
+        Count a /video_feed client; a camera encoder only runs while there
+        is one. Raises if the camera encoder fails to start, leaving the
+        count unchanged.
+        """
+        self._acquire_encoder()
+        with self._viewer_lock:
+            self.viewers += 1
+
+    def remove_viewer(self):
+        with self._viewer_lock:
+            self.viewers -= 1
+        self._release_encoder()
+
+    def _active(self):
+        """Whether someone uses captured frames: viewers of a pull encoder, or a recorder fed frames."""
+        return (self.viewers > 0 and not self.encoder.push) or self._record_frames
+
     def _update_frame(self):
         while self.running:
-            frame = self.picam2.capture_array()  # Returns a numpy array (RGB)
-            with self.lock:
-                self.frame = frame
-            if self.recording and self.writer and self.frame is not None:
-                # OpenCV expects BGR format
-                bgr_frame = cv2.cvtColor(self.frame, cv2.COLOR_RGB2BGR)
-                self.writer.write(bgr_frame)
-            time.sleep(0.03)  # ~30 FPS
+            active = self._active()
+            rate = self.fps if active else self.idle_fps
+            # start over at the other rate as soon as a viewer comes or goes or recording toggles
+            keep_rate = lambda: self.running and self._active() == active
+            if not rate:
+                # paused until frames are wanted again
+                self.scheduler = None
+                while keep_rate():
+                    time.sleep(0.05)
+                continue
+            self.scheduler = RateScheduler(rate, max_rate=MAX_FPS)
+            while self.scheduler.wait(keep_rate):
+                frame = self.picam2.capture_array()  # a new BGR-ordered array per frame
+                with self.lock:
+                    self.frame = frame
+                    self.frame_seq += 1
+                    self.frame_ready.notify_all()
+                recorder = self.recorder
+                if recorder is not None and not self._record_jpegs:
+                    # queued by reference, written on the recorder's thread
+                    recorder.submit(frame, time.monotonic())
+
+    def capture_stats(self):
+        stats = self.scheduler.stats() if self.scheduler is not None else {}
+        recorder = self.recorder
+        return {"viewers": self.viewers, "recording": self.recording, "encoder": type(self.encoder).__name__,
+                "recorder": recorder.stats() if recorder is not None else None, **stats}
+
+    def _encode(self, frame, seq):
+        """JPEG of frame number seq, encoded once however many viewers ask for it."""
+        with self._encode_lock:
+            if self._jpeg_seq < seq:
+                self._jpeg = self.encoder.encode(frame)
+                self._jpeg_seq = seq
+            # a viewer that lagged behind gets the newer frame another one already encoded
+            return self._jpeg_seq, self._jpeg
 
     def get_jpeg(self):
         with self.lock:
-            if self.frame is None:
-                return None
-            # Convert RGB to BGR for OpenCV
-            # bgr_frame = cv2.cvtColor(self.frame, cv2.COLOR_RGB2BGR)
-            ret, jpeg = cv2.imencode('.jpg', self.frame)
-            return jpeg.tobytes() if ret else None
+            if self.encoder.push:
+                return self._jpeg
+            frame, seq = self.frame, self.frame_seq
+        if frame is None:
+            return None
+        return self._encode(frame, seq)[1]
+
+    def wait_jpeg(self, last_seq=0, timeout=1.0):
+        """
+        Block until a frame newer than last_seq is available and return
+        (seq, jpeg); (last_seq, None) if none arrived within timeout.
+        """
+        # push encoders number their JPEGs, pull encoders follow captured frames
+        if self.encoder.push:
+            newer = lambda: self._jpeg_seq > last_seq or not self.running
+        else:
+            newer = lambda: self.frame_seq > last_seq or not self.running
+        with self.frame_ready:
+            if not self.frame_ready.wait_for(newer, timeout):
+                return last_seq, None
+            if self.encoder.push:
+                return self._jpeg_seq, self._jpeg
+            frame, seq = self.frame, self.frame_seq
+        if frame is None:
+            return last_seq, None
+        return self._encode(frame, seq)
 
     def start_recording(self, filename="output.avi"):
+        """Record rolling segments named after filename (without its extension) into data/videos."""
         print(f"[DEBUG] start_recording called. self.recording={getattr(self, 'recording', None)} | thread alive: {self.thread.is_alive()}")
         if not self.recording:
+            options = dict(self.recording_options)
+            codec = options.pop("codec", "xvid")
             with self.lock:
                 # Ensure the directory exists
                 video_dir = os.path.join(os.path.dirname(__file__), "data", "videos")
                 os.makedirs(video_dir, exist_ok=True)
-                # Prepend the directory to the filename
-                filename = os.path.join(video_dir, filename)
+                prefix = os.path.splitext(os.path.basename(filename))[0]
                 if self.frame is not None:
                     h, w = self.frame.shape[:2]
                 else:
                     h, w = 480, 640  # default
-                fourcc = cv2.VideoWriter_fourcc(*'XVID')
-                self.writer = cv2.VideoWriter(filename, fourcc, 20.0, (w, h))
+            if codec == "h264":
+                self.recorder = CameraH264Recorder(self.picam2, video_dir, prefix, self.fps, **options)
+            else:
+                if codec == "mjpg" and self.encoder.push:
+                    # started first: "auto" may fall back to OpenCV, which needs frames instead
+                    self._acquire_encoder()
+                    if not self.encoder.push:
+                        self._release_encoder()
+                # frames from a pull encoder are JPEG-encoded on the recorder's thread
+                self._record_jpegs = codec == "mjpg" and self.encoder.push
+                encode = None if self.encoder.push else self.encoder.encode
+                try:
+                    self.recorder = SegmentedRecorder(video_dir, prefix, codec, self.fps, (w, h), encode=encode,
+                                                      **options)
+                except Exception:
+                    if self._record_jpegs:
+                        self._record_jpegs = False
+                        self._release_encoder()
+                    raise
+                if not self._record_jpegs:
+                    self._record_frames = True
             self.recording = True
         print(f"[DEBUG] start_recording finished. self.recording={getattr(self, 'recording', None)} | thread alive: {self.thread.is_alive()}")
 
+    @property
+    def recording_path(self):
+        """Segment the running recording is writing, or None."""
+        recorder = self.recorder
+        return recorder.current_path if recorder is not None else None
+
     def stop_recording(self):
         print(f"[DEBUG] stop_recording called. self.recording={self.recording} | thread alive: {self.thread.is_alive()}")
         if self.recording:
             self.recording = False
-            if self.writer:
-                self.writer.release()
-                self.writer = None
+            self._record_frames = False
+            recorder, self.recorder = self.recorder, None
+            if recorder is not None:
+                recorder.stop()
+                print(f"[DEBUG] Recording stopped: {recorder.stats()}")
+            if self._record_jpegs:
+                self._record_jpegs = False
+                self._release_encoder()
         print(f"[DEBUG] After stop_recording: self.recording={self.recording} | thread alive: {self.thread.is_alive()}")
 
     def release(self):
         print(f"[DEBUG] release called. Thread alive before: {self.thread.is_alive()}")
-        self.running = False
+        with self.lock:
+            self.running = False
+            self.frame_ready.notify_all()
         self.stop_recording()
         self.thread.join(timeout=3)
         print(f"[DEBUG] release finished. Thread alive after: {self.thread.is_alive()}")
+        with self._viewer_lock:
+            if self.encoder.push and self._encoder_users > 0:
+                self.encoder.stop()
+                self._encoder_users = 0
         self.picam2.stop()
         self.picam2.close() 
\ No newline at end of file
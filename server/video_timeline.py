@@ -0,0 +1,250 @@
+"""
+Line recorded video up with the weight samples.
+
+Frames and weight samples are captured on separate threads (or
+processes), so every recorded segment gets a sidecar frame index,
+<segment>.frames, with one FRAME_DTYPE record per frame written:
+
+    header   32 bytes: magic, version, record size, anchor monotonic ns,
+             anchor wall-clock ns
+    records  monotonic_ns (capture time), wall_ns
+
+wall_ns maps the monotonic capture time onto the naive wall clock the
+sensor stamps its samples with (timeseries_store.to_ns), through the
+anchor pair read together when the segment was opened. A clock step in
+the middle of a segment therefore doesn't reorder its frames.
+
+Frame number n of a segment is record n of its index, so both lookups are
+binary searches: frames_between() bisects the segments by their first
+frame and then each segment's wall_ns column, nearest_sample() reads a
+small window of weight samples through range_query (itself bisecting the
+daily CSV's sparse index) and bisects that. A segment's time span comes
+from the first and last records of its index alone; only the segments a
+query overlaps are read in full, into a size-capped LRU cache.
+"""
+import datetime
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from range_query import read_range
+from timeseries_store import to_ns
+
+MAGIC = b"WFI1"
+VERSION = 1
+HEADER = struct.Struct("<4sHHqq8x")  # magic, version, record size, anchor monotonic ns, anchor wall ns
+HEADER_SIZE = HEADER.size
+FRAME_DTYPE = np.dtype([("monotonic_ns", "<i8"), ("wall_ns", "<i8")])
+INDEX_EXTENSION = ".frames"
+# full indexes kept for frames_between(); a 600 s segment at 30 fps is 288 KB
+INDEX_CACHE_BYTES = 8 * 1024 * 1024
+
+def frame_index_path(segment_path):
+    return segment_path + INDEX_EXTENSION
+
+class FrameIndexWriter:
+    def __init__(self, segment_path, flush_frames=30):
+        self.path = frame_index_path(segment_path)
+        self.flush_frames = flush_frames
+        self.frames = 0
+        # read back to back; wall_ns of every frame is measured from this pair
+        self.anchor_monotonic_ns = time.monotonic_ns()
+        self.anchor_wall_ns = to_ns(datetime.datetime.now())
+        self._buffer = np.zeros(flush_frames, dtype=FRAME_DTYPE)
+        self._pending = 0
+        self._file = open(self.path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, FRAME_DTYPE.itemsize,
+                                     self.anchor_monotonic_ns, self.anchor_wall_ns))
+
+    def write(self, timestamp):
+        """Record the next frame's capture time, time.monotonic() seconds."""
+        monotonic_ns = int(timestamp * 1e9)
+        record = self._buffer[self._pending]
+        record["monotonic_ns"] = monotonic_ns
+        record["wall_ns"] = self.anchor_wall_ns + monotonic_ns - self.anchor_monotonic_ns
+        self._pending += 1
+        self.frames += 1
+        if self._pending >= self.flush_frames:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._file.write(self._buffer[:self._pending].tobytes())
+            self._file.flush()
+            self._pending = 0
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+def _open_index(path):
+    """(file positioned past the header, complete records); (None, 0) until the header is written."""
+    f = open(path, "rb")
+    header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        f.close()
+        return None, 0
+    magic, version, record_size, _, _ = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or record_size != FRAME_DTYPE.itemsize:
+        f.close()
+        raise ValueError(f"{path} is not a version {VERSION} frame index")
+    # a partly written last record doesn't count
+    return f, (os.fstat(f.fileno()).st_size - HEADER_SIZE) // FRAME_DTYPE.itemsize
+
+def _read_record(f, n):
+    f.seek(HEADER_SIZE + n * FRAME_DTYPE.itemsize)
+    return np.frombuffer(f.read(FRAME_DTYPE.itemsize), dtype=FRAME_DTYPE)[0]
+
+def read_frame_index(segment_path):
+    """FRAME_DTYPE records of a segment, one per frame; a partly written last record is ignored."""
+    f, frames = _open_index(frame_index_path(segment_path))
+    if f is None:
+        return np.zeros(0, dtype=FRAME_DTYPE)
+    with f:
+        data = f.read(frames * FRAME_DTYPE.itemsize)
+    return np.frombuffer(data, dtype=FRAME_DTYPE)
+
+def segment_extent(segment_path):
+    """
+    (first wall ns, last wall ns) of a segment's frames, from the first and
+    last records of its index alone; None when it has no frames yet.
+    """
+    f, frames = _open_index(frame_index_path(segment_path))
+    if f is None:
+        return None
+    with f:
+        if not frames:
+            return None
+        return int(_read_record(f, 0)["wall_ns"]), int(_read_record(f, frames - 1)["wall_ns"])
+
+class FrameIndexCache:
+    """
+    read_frame_index results, revalidated by the sidecar's mtime and size
+    (the recording segment grows) and evicted least recently used first
+    once they hold more than max_bytes.
+    """
+
+    def __init__(self, max_bytes=INDEX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # segment path -> ((mtime_ns, size), frames)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def load(self, segment_path):
+        try:
+            stat = os.stat(frame_index_path(segment_path))
+        except FileNotFoundError:
+            self.discard([segment_path])  # removed by retention
+            raise
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._entries.get(segment_path)
+            if cached is not None and cached[0] == key:
+                self._entries.move_to_end(segment_path)
+                return cached[1]
+        frames = read_frame_index(segment_path)
+        with self._lock:
+            old = self._entries.pop(segment_path, None)
+            if old is not None:
+                self._bytes -= old[1].nbytes
+            if frames.nbytes <= self.max_bytes:
+                self._entries[segment_path] = (key, frames)
+                self._bytes += frames.nbytes
+                while self._bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+        return frames
+
+    def discard(self, segment_paths):
+        with self._lock:
+            for segment_path in segment_paths:
+                old = self._entries.pop(segment_path, None)
+                if old is not None:
+                    self._bytes -= old[1].nbytes
+
+    def prune(self, video_dir, segment_paths):
+        """Drop the cached segments of video_dir that aren't in segment_paths any more."""
+        with self._lock:
+            gone = [path for path in self._entries
+                    if os.path.dirname(path) == video_dir and path not in segment_paths]
+        self.discard(gone)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+_index_cache = FrameIndexCache()
+
+def frame_index(segment_path):
+    """read_frame_index, cached until the sidecar changes (the recording segment grows)."""
+    return _index_cache.load(segment_path)
+
+def indexed_segments(video_dir):
+    """(first wall ns, last wall ns, segment path) of every segment with frames, sorted by first frame."""
+    segments = []
+    if not os.path.isdir(video_dir):
+        return segments
+    for name in os.listdir(video_dir):
+        if not name.endswith(INDEX_EXTENSION):
+            continue
+        segment = os.path.join(video_dir, name[:-len(INDEX_EXTENSION)])
+        try:
+            extent = segment_extent(segment)
+        except (OSError, ValueError):
+            continue
+        if extent is not None:
+            segments.append((*extent, segment))
+    _index_cache.prune(video_dir, {segment for _, _, segment in segments})
+    segments.sort()
+    return segments
+
+def frames_between(video_dir, start, end):
+    """
+    [(segment path, frame number, wall ns)] of the frames captured in
+    [start, end] (wall-clock ns), in capture order across segments.
+    """
+    segments = indexed_segments(video_dir)
+    # segments don't overlap in time: skip every one that ends before start
+    lasts = [last for _, last, _ in segments]
+    i = int(np.searchsorted(lasts, start, side="left"))
+    found = []
+    for first, _, segment in segments[i:]:
+        if first > end:
+            break
+        try:
+            wall = frame_index(segment)["wall_ns"]
+        except (OSError, ValueError):
+            continue  # removed by retention since it was listed
+        lo = int(np.searchsorted(wall, start, side="left"))
+        hi = int(np.searchsorted(wall, end, side="right"))
+        found.extend((segment, n, int(wall[n])) for n in range(lo, hi))
+    return found
+
+def frame_time(segment_path, frame):
+    """Wall-clock ns at which frame number `frame` of a segment was captured; reads just that record."""
+    f, frames = _open_index(frame_index_path(segment_path))
+    if f is None or not 0 <= frame < frames:
+        if f is not None:
+            f.close()
+        raise IndexError(f"{os.path.basename(segment_path)} has no frame {frame}")
+    with f:
+        return int(_read_record(f, frame)["wall_ns"])
+
+def nearest_sample(data_dir, series_dir, timestamp_ns, tolerance_ns=2_000_000_000):
+    """
+    (timestamp ns, value) of the weight sample closest to timestamp_ns,
+    or None if there is none within tolerance_ns either side. Failed reads
+    (NaN) are skipped.
+    """
+    series = read_range(data_dir, series_dir, timestamp_ns - tolerance_ns, timestamp_ns + tolerance_ns)
+    valid = ~np.isnan(series.values)
+    timestamps, values = series.timestamps[valid], series.values[valid]
+    if not len(timestamps):
+        return None
+    i = int(np.searchsorted(timestamps, timestamp_ns))
+    # the closer of the samples either side of timestamp_ns
+    if i == len(timestamps) or (i > 0 and timestamp_ns - timestamps[i - 1] <= timestamps[i] - timestamp_ns):
+        i -= 1
+    return int(timestamps[i]), float(values[i])